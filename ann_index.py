@@ -0,0 +1,122 @@
+import heapq
+import os
+import threading
+
+import numpy as np
+
+from atomic_io import atomic_write
+from similarity import normalize, top_similar_pairs
+
+INDEX_FILE = "lsh.npz"
+
+
+class LSHIndex:
+    """Random-hyperplane LSH over the rows of an EmbeddingCache.
+
+    Each of num_tables tables hashes a vector to num_bits sign bits. Vectors
+    with a high cosine similarity tend to share a bucket in at least one table,
+    so only pairs inside a bucket are scored. Buckets are capped at max_bucket
+    rows, so the work per table is O(n * max_bucket) instead of O(n²).
+
+    Signatures are stored per cache row. The index lives next to the cache
+    vectors, and update() only hashes rows appended since the last save.
+    """
+
+    def __init__(self, dim, num_tables=16, num_bits=8, max_bucket=256, seed=0):
+        self.dim = dim
+        self.num_tables = num_tables
+        self.num_bits = num_bits
+        self.max_bucket = max_bucket
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((num_tables * num_bits, dim)).astype(np.float32)
+        self.signatures = np.empty((0, num_tables), dtype=np.int64)
+
+    def _params(self):
+        return (self.dim, self.num_tables, self.num_bits, self.max_bucket, self.seed)
+
+    def hash(self, vectors):
+        """Returns an (n, num_tables) array of bucket ids."""
+        bits = (np.asarray(vectors, dtype=np.float32) @ self.planes.T) > 0
+        bits = bits.reshape(len(bits), self.num_tables, self.num_bits)
+        weights = np.left_shift(1, np.arange(self.num_bits, dtype=np.int64))
+        return bits.astype(np.int64) @ weights
+
+    def update(self, cache_vectors):
+        """Hashes rows of cache_vectors that are not indexed yet. Returns how many were added."""
+        start = len(self.signatures)
+        if len(cache_vectors) <= start:
+            return 0
+        self.signatures = np.concatenate([self.signatures, self.hash(cache_vectors[start:])])
+        return len(self.signatures) - start
+
+    def save(self, path):
+        with atomic_write(path, "wb") as f:
+            np.savez(f, params=np.array(self._params()), planes=self.planes, signatures=self.signatures)
+
+    @classmethod
+    def load(cls, path, dim, **params):
+        """Loads a saved index, or returns a fresh one if none exists or its parameters differ."""
+        index = cls(dim, **params)
+        if os.path.exists(path):
+            with np.load(path) as saved:
+                if tuple(saved["params"]) == index._params():
+                    index.planes = saved["planes"]
+                    index.signatures = saved["signatures"]
+        return index
+
+    def top_pairs(self, vectors, signatures, k=1):
+        """Approximate top-k most similar pairs among normalized vectors.
+
+        signatures[i] must be the hash of vectors[i]. Returns [(score, i, j), ...], best first.
+        """
+        best = {}
+        for table in range(self.num_tables):
+            keys = signatures[:, table]
+            order = np.argsort(keys, kind="stable")
+            boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+            for bucket in np.split(order, boundaries):
+                for offset in range(0, len(bucket), self.max_bucket):
+                    members = bucket[offset:offset + self.max_bucket]
+                    if len(members) < 2:
+                        continue
+                    for score, a, b in top_similar_pairs(vectors[members], k=k, normalized=True):
+                        i, j = sorted((int(members[a]), int(members[b])))
+                        best[(i, j)] = score
+        return [(score, i, j) for (i, j), score in heapq.nlargest(k, best.items(), key=lambda item: item[1])]
+
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def approximate_similar_pairs(cache, cache_vectors, rows, k=1, sample_size=1000, **params):
+    """Top-k similar pairs among cache rows via the cache's persistent LSH index.
+
+    cache_vectors is the matrix returned by cache.lookup_rows() along with rows.
+
+    Pair indices refer to positions in rows. Also returns recall: the share of
+    the exact top-k pairs the index finds, measured on a random sample of at
+    most sample_size rows.
+    """
+    path = os.path.join(cache.directory, INDEX_FILE)
+    with _locks_lock:
+        lock = _locks.setdefault(path, threading.Lock())
+
+    with lock:
+        index = LSHIndex.load(path, cache_vectors.shape[1], **params)
+        if index.update(cache_vectors):
+            index.save(path)
+
+    rows = np.asarray(rows)
+    vectors = normalize(cache_vectors[rows])
+    signatures = index.signatures[rows]
+    pairs = index.top_pairs(vectors, signatures, k)
+
+    rng = np.random.default_rng(0)
+    sample = np.sort(rng.choice(len(rows), size=min(sample_size, len(rows)), replace=False))
+    exact = {(i, j) for _, i, j in top_similar_pairs(vectors[sample], k=k, normalized=True)}
+    found = {(i, j) for _, i, j in index.top_pairs(vectors[sample], signatures[sample], k)}
+    recall = len(exact & found) / len(exact) if exact else 1.0
+
+    return pairs, recall
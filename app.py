@@ -1,8 +1,25 @@
+import os
 from flask import Flask, request, jsonify
-from task_executor import execute_task  # Import task execution logic
+from task_executor import execute_task, tasks  # Import task execution logic
+from model_pool import models
+from jobs import QueueFull, create_queue
+from memo import results as memo_results
+from query_cache import queries
+from watcher import Watcher, derived_outputs
 
 app = Flask(__name__)
 
+# Load the embedding model in the background so the first A9 request doesn't pay for it
+if os.environ.get("WARM_MODELS", "1") != "0":
+    models.warm()
+
+job_queue = create_queue(execute_task)
+
+# WATCH_INPUTS=1 recomputes A3-A6 in the background whenever their inputs change
+watcher = None
+if os.environ.get("WATCH_INPUTS", "0") == "1":
+    watcher = Watcher(derived_outputs(), poll_interval=float(os.environ.get("WATCH_POLL_INTERVAL", 2))).start()
+
 @app.route('/')
 def home():
     return 'Flask API is running!'
@@ -15,6 +32,17 @@ def run_task():
     if not task_description:
         return jsonify({"error": "Task description is required"}), 400
 
+    # ?async=1 queues the task and returns a job id to poll at /jobs/<id>
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        entry = tasks.match(task_description)
+        if entry is None:
+            return jsonify({"status": "error", "error": "Bad Request", "details": "Unknown task"}), 400
+        try:
+            job = job_queue.submit(task_description, entry.name)
+        except QueueFull as e:
+            return jsonify({"status": "error", "error": "Service Unavailable", "details": str(e)}), 503
+        return jsonify({"status": "queued", "job_id": job["id"], "task": job["task"]}), 202, {"Location": f"/jobs/{job['id']}"}
+
     result = execute_task(task_description)
 
     if result["status"] == "success":
@@ -24,7 +52,6 @@ def run_task():
     else:
         return jsonify(result), 500
     
-import os
 from flask import Response
 
 @app.route('/read', methods=['GET'])
@@ -55,6 +82,46 @@ def read_file():
         return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
 
 
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Lists known jobs and the load on each task lane."""
+    return jsonify({"jobs": job_queue.list(), "lanes": job_queue.lanes()}), 200
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Reports the status, timing and result of a queued task."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+@app.route('/cache', methods=['GET'])
+def cache_stats():
+    """Reports hit/miss counters of the task result cache."""
+    return jsonify(memo_results.stats()), 200
+
+
+@app.route('/cache/queries', methods=['GET'])
+def query_cache_stats():
+    """Reports size and hit rate of the SQL query result cache."""
+    return jsonify(queries.stats()), 200
+
+
+@app.route('/watcher', methods=['GET'])
+def watcher_stats():
+    """Reports how the input watcher runs and when it last recomputed each output."""
+    if watcher is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **watcher.stats()}), 200
+
+
+@app.route('/models', methods=['GET'])
+def model_stats():
+    """Reports load time and memory footprint of the resident embedding models."""
+    return jsonify(models.stats()), 200
+
 
 if __name__ == '__main__':
     app.run(debug=True)
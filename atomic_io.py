@@ -0,0 +1,49 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def path_lock(path):
+    """Returns the lock that serializes writers of one output file."""
+    key = os.path.normcase(os.path.abspath(path))
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.RLock()
+        return lock
+
+
+@contextmanager
+def atomic_write(path, mode="w", encoding="utf-8"):
+    """Opens a temp file next to path and renames it over path when the block succeeds.
+
+    Readers see either the old file or the complete new one, never a partial
+    write. Writers of the same path take turns; different paths don't block
+    each other. If the block raises, the temp file is removed and path is left
+    untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    if "b" in mode:
+        encoding = None
+
+    with path_lock(path):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode, encoding=encoding) as f:
+                # mkstemp creates the file as 0600, keep the permissions the output had before
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,396 @@
+# Micro-benchmarks for the task engines.
+
+# Usage: python benchmarks.py <name> [<name> ...]
+#        python benchmarks.py all
+
+import random
+import string
+import time
+
+from task_router import TaskRegistry
+
+
+def timed(fn, repeat=1):
+    """Returns the best wall time of `repeat` calls to fn, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def random_word(rng, length=8):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def bench_dispatch():
+    """Dispatch cost of the compiled TaskRegistry vs. the old if-cascade as the task count grows."""
+    rng = random.Random(0)
+    calls = 2000
+    description = "Please read last 10 lines of logs/server.log and write them to tail.txt"
+
+    # The cascade column only finds the task, like registry.match; dispatch also extracts args and calls it
+    print(f"{'tasks':>8} {'cascade µs':>12} {'match µs':>12} {'dispatch µs':>12}")
+    for size in (20, 100, 500, 1000):
+        registry = TaskRegistry()
+        cascade = []
+        for i in range(size - 1):
+            triggers = (random_word(rng), random_word(rng))
+            registry.add(f"T{i}", lambda: None, triggers)
+            cascade.append(triggers)
+        # The real task sits at the end, the worst case for the cascade
+        registry.add("B8", lambda *args: None, ("read last", "lines of"), args=r"read last (\d+) lines of (.+)")
+        cascade.append(("read last", "lines of"))
+
+        def run_cascade():
+            for _ in range(calls):
+                s = description.lower()
+                for first, second in cascade:
+                    if first in s and second in s:
+                        break
+
+        def run_match():
+            for _ in range(calls):
+                registry.match(description)
+
+        def run_dispatch():
+            for _ in range(calls):
+                registry.dispatch(description)
+
+        registry.dispatch(description)  # Compile outside the timed region
+        cascade_us = timed(run_cascade, 3) / calls * 1e6
+        match_us = timed(run_match, 3) / calls * 1e6
+        dispatch_us = timed(run_dispatch, 3) / calls * 1e6
+        print(f"{size:>8} {cascade_us:>12.2f} {match_us:>12.2f} {dispatch_us:>12.2f}")
+
+
+def loop_similar_pair(embeddings, max_pairs=None):
+    """The original run_A9 double loop: one cosine-similarity call per pair."""
+    try:
+        import torch
+        from sentence_transformers import util
+        embeddings = torch.as_tensor(embeddings)
+        cos_sim = lambda a, b: util.pytorch_cos_sim(a, b).item()
+    except ImportError:
+        import numpy as np
+        cos_sim = lambda a, b: float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    best, done = (-1, 0, 0), 0
+    for i in range(len(embeddings)):
+        for j in range(i + 1, len(embeddings)):
+            similarity = cos_sim(embeddings[i], embeddings[j])
+            if similarity > best[0]:
+                best = (similarity, i, j)
+            done += 1
+            if max_pairs and done >= max_pairs:
+                return best, done
+    return best, done
+
+
+def bench_similarity():
+    """All-pairs top-k similarity: blocked matrix multiplies vs. the per-pair loop.
+
+    The loop is timed on at most 50k pairs and extrapolated for larger inputs.
+    """
+    import numpy as np
+    from similarity import top_similar_pairs
+
+    rng = np.random.default_rng(0)
+    print(f"{'comments':>10} {'loop s':>12} {'blocked s':>12} {'speedup':>10}")
+    for n in (100, 10_000, 100_000):
+        embeddings = rng.standard_normal((n, 384), dtype=np.float32)
+        total_pairs = n * (n - 1) // 2
+
+        start = time.perf_counter()
+        _, done = loop_similar_pair(embeddings, max_pairs=50_000)
+        loop_s = (time.perf_counter() - start) * total_pairs / done
+        estimated = "~" if done < total_pairs else ""
+
+        blocked_s = timed(lambda: top_similar_pairs(embeddings, k=10))
+        print(f"{n:>10} {estimated + format(loop_s, '.3f'):>12} {blocked_s:>12.3f} {loop_s / blocked_s:>9.0f}x")
+
+
+def write_synthetic_log(path, size_mb, seed=0):
+    """Writes roughly size_mb MB of log-like lines, including some non-ASCII text."""
+    rng = random.Random(seed)
+    words = [random_word(rng, rng.randint(3, 9)) for _ in range(500)] + ["café", "naïve", "日本語", "😀"]
+    block = "\n".join(" ".join(rng.choice(words) for _ in range(12)) for _ in range(10_000)) + "\n"
+    data = block.encode("utf-8")
+    with open(path, "wb") as f:
+        for _ in range(max(1, size_mb * 1024 * 1024 // len(data))):
+            f.write(data)
+
+
+def bench_tail():
+    """Last 10 lines of large files: reverse block reader vs. deque over the whole file."""
+    import os
+    import tempfile
+    from collections import deque
+    from tail import tail_lines
+
+    print(f"{'file MB':>8} {'deque s':>10} {'reverse s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in (10, 100, 1000):
+            path = os.path.join(tmp, f"synthetic-{size_mb}.log")
+            write_synthetic_log(path, size_mb)
+
+            def read_deque():
+                with open(path, "r", encoding="utf-8") as f:
+                    return [line.strip() for line in deque(f, 10) if line.strip()]
+
+            assert read_deque() == tail_lines(path, 10)
+            deque_s = timed(read_deque)
+            reverse_s = timed(lambda: tail_lines(path, 10), 5)
+            print(f"{size_mb:>8} {deque_s:>10.3f} {reverse_s:>10.6f}")
+            os.remove(path)
+
+
+def bench_wordcount():
+    """Top-10 words over 8 x 64 MB files: single read() pipeline vs. sharded process pool."""
+    import os
+    import string
+    import tempfile
+    from collections import Counter
+    from concurrent.futures import ProcessPoolExecutor
+    from word_count import top_words
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"corpus-{i}.txt") for i in range(8)]
+        for i, path in enumerate(paths):
+            write_synthetic_log(path, 64, seed=i)
+        total_mb = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+
+        def read_all():
+            counts = Counter()
+            for path in paths:
+                with open(path, "r", encoding="utf-8") as f:
+                    counts.update(f.read().lower().translate(str.maketrans("", "", string.punctuation)).split())
+            return counts.most_common(10)
+
+        baseline_s = timed(read_all)
+        print(f"{'workers':>8} {'seconds':>9} {'MB/s':>8}")
+        print(f"{'read()':>8} {baseline_s:>9.2f} {total_mb / baseline_s:>8.1f}")
+        for workers in sorted({1, 2, 4, os.cpu_count()}):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                seconds = timed(lambda: top_words(paths, 10, shard_size=16 * 1024 * 1024, pool=pool))
+            print(f"{workers:>8} {seconds:>9.2f} {total_mb / seconds:>8.1f}")
+
+
+def bench_hashing():
+    """Hashing throughput in MB/s: 4 KiB read loop vs. the hashing engine's modes."""
+    import hashlib
+    import os
+    import tempfile
+    from hashing import hash_file, hash_files
+
+    def read_loop(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(4096), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        big = os.path.join(tmp, "big.bin")
+        with open(big, "wb") as f:
+            for _ in range(512):
+                f.write(os.urandom(1024 * 1024))
+        small = [os.path.join(tmp, f"small-{i}.bin") for i in range(64)]
+        for path in small:
+            with open(path, "wb") as f:
+                f.write(os.urandom(8 * 1024 * 1024))
+
+        big_mb = os.path.getsize(big) / 1024 / 1024
+        small_mb = sum(os.path.getsize(p) for p in small) / 1024 / 1024
+        cases = [
+            ("4 KiB read loop", big_mb, lambda: read_loop(big)),
+            ("adaptive buffer", big_mb, lambda: hash_file(big, use_mmap=False)),
+            ("mmap", big_mb, lambda: hash_file(big, use_mmap=True)),
+            ("sha256+md5+sha1, one pass", big_mb, lambda: hash_file(big, ("sha256", "md5", "sha1"))),
+            ("64 files, read loop", small_mb, lambda: [read_loop(p) for p in small]),
+            ("64 files, thread pool", small_mb, lambda: hash_files(small)),
+        ]
+        assert read_loop(big) == hash_file(big, use_mmap=True)["sha256"] == hash_file(big, use_mmap=False)["sha256"]
+        for label, mb, fn in cases:
+            print(f"{label:>28} {mb / timed(fn, 3):>9.1f} MB/s")
+
+
+def bench_tickets():
+    """Bulk-load cost of the covering index and aggregate triggers, and the Gold total query time they buy."""
+    import os
+    import sqlite3
+    import tempfile
+    from ticket_aggregates import materialize, total_sales_sql
+
+    rng = random.Random(0)
+    batch = [(rng.choice(("Gold", "Silver", "Bronze")), rng.randint(1, 10), round(rng.uniform(50, 150), 2))
+             for _ in range(100_000)]
+
+    print(f"{'rows':>10} {'setup':>14} {'load s':>8} {'rows/s':>10} {'gold query ms':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (100_000, 1_000_000):
+            for setup in ("plain", "indexed", "materialized"):
+                path = os.path.join(tmp, f"{setup}-{rows}.db")
+                conn = sqlite3.connect(path)
+                conn.execute("CREATE TABLE tickets (type TEXT NOT NULL, units INTEGER NOT NULL, price DECIMAL(10,2) NOT NULL)")
+                if setup == "indexed":
+                    conn.execute("CREATE INDEX tickets_type_sales ON tickets (type, units, price)")
+                elif setup == "materialized":
+                    materialize(conn)
+
+                def load():
+                    with conn:
+                        for _ in range(rows // len(batch)):
+                            conn.executemany("INSERT INTO tickets VALUES (?, ?, ?)", batch)
+
+                load_seconds = timed(load)
+                sql = total_sales_sql(conn, "Gold")
+                query_ms = timed(lambda: conn.execute(sql).fetchone(), 5) * 1000
+                print(f"{rows:>10} {setup:>14} {load_seconds:>8.2f} {rows / load_seconds:>10.0f} {query_ms:>14.3f}")
+                conn.close()
+
+
+def bench_scan():
+    """Top-10 newest of 100k files (glob + sort by getmtime vs. one scandir pass + nlargest), and head reads."""
+    import glob
+    import os
+    import tempfile
+    from file_scan import first_line, newest, read_heads, scan_files
+    from markdown_index import build_index, first_h1
+
+    count = 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = os.path.join(tmp, "logs")
+        docs = os.path.join(tmp, "docs")
+        for directory in (logs, *(os.path.join(docs, f"d{i}") for i in range(10))):
+            os.makedirs(directory)
+        for i in range(count):
+            with open(os.path.join(logs, f"{i}.log"), "w") as f:
+                f.write(f"entry {i}\n")
+            os.utime(os.path.join(logs, f"{i}.log"), ns=(i * 1000, i * 1000))
+            with open(os.path.join(docs, f"d{i % 10}", f"{i}.md"), "w") as f:
+                f.write(f"intro\n# Title {i}\nbody\n")
+
+        def sorted_glob():
+            files = sorted(glob.glob(os.path.join(logs, "*.log")), key=os.path.getmtime, reverse=True)
+            return [first_line(path) for path in files[:10]]
+
+        def scanned():
+            return read_heads([entry.path for entry in newest(scan_files(logs, ".log"), 10)], first_line)
+
+        assert sorted_glob() == scanned()
+        paths = [entry.path for entry in scan_files(docs, ".md", recursive=True)]
+        index, state = os.path.join(tmp, "index.json"), os.path.join(tmp, "state.json")
+        cases = [
+            ("A5 glob + sorted(getmtime)", sorted_glob),
+            ("A5 scandir + nlargest", scanned),
+            (f"{count} head reads, serial", lambda: [first_h1(path) for path in paths]),
+            (f"{count} head reads, thread pool", lambda: read_heads(paths, first_h1)),
+            ("A6 index, first run", lambda: build_index(docs, index, state)),
+            ("A6 index, nothing changed", lambda: build_index(docs, index, state)),
+        ]
+        for label, fn in cases:
+            print(f"{label:>32} {timed(fn):>8.3f} s")
+
+
+def bench_dates():
+    """Counting Wednesdays in 10M mixed-format dates: strptime per line vs. slicing vs. NumPy batches."""
+    import datetime
+    import os
+    import tempfile
+    from date_parse import FORMATS, count_weekdays
+
+    def strptime_loop(path):
+        counts = [0] * 7
+        with open(path, "r") as f:
+            for line in f:
+                text = line.strip()
+                for fmt in FORMATS:
+                    try:
+                        counts[datetime.datetime.strptime(text, fmt).weekday()] += 1
+                        break
+                    except ValueError:
+                        continue
+        return counts, 0
+
+    rng = random.Random(0)
+    start = datetime.datetime(2000, 1, 1)
+    sample = [(start + datetime.timedelta(seconds=rng.randrange(25 * 365 * 86400))).strftime(rng.choice(FORMATS))
+              for _ in range(100_000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dates.txt")
+        with open(path, "w") as f:
+            for _ in range(100):
+                f.write("\n".join(sample) + "\n")
+        lines = len(sample) * 100
+
+        expected = None
+        for label, fn in (("strptime", strptime_loop),
+                          ("prefix check + slicing", lambda p: count_weekdays(p, vectorized=False)),
+                          ("NumPy datetime64", lambda p: count_weekdays(p, vectorized=True))):
+            result = []
+            seconds = timed(lambda: result.append(fn(path)))
+            assert expected is None or result[0] == expected
+            expected = result[0]
+            print(f"{label:>24} {seconds:>8.2f} s {lines / seconds / 1e6:>8.2f} M lines/s")
+
+
+def bench_json():
+    """Parse and serialize times of each installed JSON backend on contacts.json- and api-data.json-shaped data."""
+    import json_backend
+
+    rng = random.Random(0)
+    contacts = [{"first_name": random_word(rng, 6).title(), "last_name": random_word(rng, 8).title(),
+                 "email": f"{random_word(rng)}@example.com"} for _ in range(100_000)]
+    api_data = [{"id": i, "title": random_word(rng, 20), "completed": i % 3 == 0, "score": rng.random(),
+                 "tags": [random_word(rng, 5) for _ in range(3)], "user": {"id": i % 100, "name": random_word(rng)}}
+                for i in range(50_000)]
+    files = {
+        "contacts": json_backend.dumps(contacts),
+        "api-data": json_backend.dumps(api_data),
+    }
+
+    print(f"{'backend':>8} {'file':>9} {'MB':>6} {'loads ms':>9} {'indent=4 ms':>12} {'compact ms':>11} {'typed ms':>9}")
+    for name in json_backend.BACKENDS:
+        try:
+            json_backend.use_backend(name)
+        except ImportError:
+            print(f"{name:>8} not installed")
+            continue
+        for label, data in files.items():
+            parsed = json_backend.loads(data)
+            loads_ms = timed(lambda: json_backend.loads(data), 3) * 1000
+            pretty_ms = timed(lambda: json_backend.dumps(parsed, 4), 3) * 1000
+            compact_ms = timed(lambda: json_backend.dumps(parsed), 3) * 1000
+            typed = ""
+            if label == "contacts" and json_backend.decode_contacts(data) is not None:
+                typed = f"{timed(lambda: json_backend.decode_contacts(data), 3) * 1000:.1f}"
+            print(f"{name:>8} {label:>9} {len(data) / 1e6:>6.1f} {loads_ms:>9.1f} {pretty_ms:>12.1f} {compact_ms:>11.1f} {typed:>9}")
+    json_backend.use_backend("auto")
+
+
+BENCHMARKS = {
+    "dispatch": bench_dispatch,
+    "similarity": bench_similarity,
+    "tail": bench_tail,
+    "wordcount": bench_wordcount,
+    "hashing": bench_hashing,
+    "tickets": bench_tickets,
+    "scan": bench_scan,
+    "dates": bench_dates,
+    "json": bench_json,
+}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="+", choices=[*BENCHMARKS, "all"])
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS) if "all" in args.names else args.names
+    for name in names:
+        print(f"== {name}")
+        BENCHMARKS[name]()
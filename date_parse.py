@@ -0,0 +1,185 @@
+import datetime
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+MONTHS = {name: number for number, name in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+# The formats datagen.get_dates writes, tried with strptime for lines the fast path can't slice
+FORMATS = ("%Y-%m-%d", "%d-%b-%Y", "%b %d, %Y", "%Y/%m/%d %H:%M:%S")
+BATCH_BYTES = 16 * 1024 * 1024  # Bytes of the file per NumPy batch
+
+
+def parse_date(text):
+    """Parses one stripped line in any of FORMATS into a datetime.date.
+
+    The format is told apart by one or two characters: "2024-03-14" and
+    "2024/03/14 15:30:45" have a separator at index 4, "14-Mar-2024" at
+    index 2, and "Mar 14, 2024" starts with a letter. The fields are then
+    sliced out directly. Anything else (e.g. an unpadded day) goes through
+    strptime. Raises ValueError for text that is not a date.
+    """
+    try:
+        separator = text[4:5]
+        if separator == "-" and len(text) == 10:
+            return datetime.date(int(text[:4]), int(text[5:7]), int(text[8:10]))
+        if separator == "/" and len(text) == 19:
+            return datetime.date(int(text[:4]), int(text[5:7]), int(text[8:10]))
+        if text[2:3] == "-" and len(text) == 11:
+            return datetime.date(int(text[7:11]), MONTHS[text[3:6]], int(text[:2]))
+        if text[3:4] == " " and text[6:8] == ", " and len(text) == 12:
+            return datetime.date(int(text[8:12]), MONTHS[text[:3]], int(text[4:6]))
+    except (KeyError, ValueError):
+        pass
+    for fmt in FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {text!r}")
+
+
+def weekday_number(name):
+    """0 for Monday ... 6 for Sunday, from a day name such as "Wednesday" or "wednesdays"."""
+    day = name.lower().rstrip("s")
+    if day not in WEEKDAYS:
+        raise ValueError(f"Unknown weekday: {name}")
+    return WEEKDAYS.index(day)
+
+
+def weekday_counts(lines):
+    """Counts dates per weekday (Monday first) in an iterable of lines. Returns (counts, unparsed)."""
+    counts = [0] * 7
+    unparsed = 0
+    for line in lines:
+        text = line.strip()
+        if not text:
+            continue
+        try:
+            counts[parse_date(text).weekday()] += 1
+        except ValueError:
+            unparsed += 1
+    return counts, unparsed
+
+
+def _read_batches(path, block_size=BATCH_BYTES):
+    """Yields lists of the byte lines of a file, split a block at a time."""
+    with open(path, "rb") as f:
+        carry = b""
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines = (carry + block).replace(b"\r", b"").split(b"\n")
+            carry = lines.pop()  # May continue in the next block
+            yield lines
+        if carry:
+            yield [carry]
+
+
+_MONTH_CODES = _MONTH_ORDER = None
+
+
+def _month_codes():
+    """Month names packed into 24-bit integers, and the order that sorts them."""
+    import numpy as np
+
+    global _MONTH_CODES, _MONTH_ORDER
+    codes = np.array([(ord(n[0]) << 16) | (ord(n[1]) << 8) | ord(n[2]) for n in MONTHS], dtype=np.int64)
+    _MONTH_CODES, _MONTH_ORDER = codes, np.argsort(codes)
+
+
+def _weekday_counts_numpy(lines):
+    """weekday_counts() for one batch, vectorized over fixed-width byte rows.
+
+    lines are bytes. Each line becomes a row of a uint8 matrix, the format
+    of every row is classified from its separator columns, the digits are
+    turned into numbers with column arithmetic, and month names are matched
+    as packed 3-byte codes. Rows that don't fit any fixed layout are handed
+    to parse_date().
+    """
+    import numpy as np
+
+    if _MONTH_CODES is None:
+        _month_codes()
+
+    if not lines:
+        return [0] * 7, 0
+    # Longer lines are cut to 19 bytes here, but then fail the length checks
+    rows = np.array(lines, dtype="S19").view(np.uint8).reshape(len(lines), 19)
+    lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+
+    def number(sub, start, width):
+        digits = sub[:, start:start + width].astype(np.int32) - ord("0")
+        ok = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        value = digits[:, 0]
+        for column in range(1, width):
+            value = value * 10 + digits[:, column]
+        return value, ok
+
+    def month(sub, start):
+        chars = sub[:, start:start + 3].astype(np.int32)
+        codes = (chars[:, 0] << 16) | (chars[:, 1] << 8) | chars[:, 2]
+        position = np.clip(np.searchsorted(_MONTH_CODES[_MONTH_ORDER], codes), 0, 11)
+        return _MONTH_ORDER[position] + 1, _MONTH_CODES[_MONTH_ORDER][position] == codes
+
+    layouts = (
+        # (rows in the layout, (year start, width), month parser, (day start, width)), as in parse_date()
+        ((rows[:, 4] == ord("-")) & (lengths == 10), (0, 4), lambda sub: number(sub, 5, 2), (8, 2)),
+        ((rows[:, 4] == ord("/")) & (lengths == 19), (0, 4), lambda sub: number(sub, 5, 2), (8, 2)),
+        ((rows[:, 2] == ord("-")) & (lengths == 11), (7, 4), lambda sub: month(sub, 3), (0, 2)),
+        ((rows[:, 3] == ord(" ")) & (rows[:, 6] == ord(",")) & (lengths == 12), (8, 4), lambda sub: month(sub, 0), (4, 2)),
+    )
+    years = np.zeros(len(rows), dtype=np.int64)
+    months = np.zeros(len(rows), dtype=np.int64)
+    days = np.zeros(len(rows), dtype=np.int64)
+    valid = np.zeros(len(rows), dtype=bool)
+    for selected, year_field, parse_month, day_field in layouts:
+        # Only the rows in this layout are sliced and converted
+        index = np.flatnonzero(selected & ~valid)
+        sub = rows[index]
+        year, year_ok = number(sub, *year_field)
+        mon, mon_ok = parse_month(sub)
+        day, day_ok = number(sub, *day_field)
+        ok = year_ok & mon_ok & day_ok
+        index = index[ok]
+        years[index], months[index], days[index] = year[ok], mon[ok], day[ok]
+        valid[index] = True
+
+    # Days since 1970-01-01 (a Thursday) via datetime64, rejecting impossible dates like 02-30
+    valid &= (years >= 1) & (months >= 1) & (months <= 12) & (days >= 1)
+    first = (years[valid] - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (months[valid] - 1)
+    first_day = first.astype("datetime64[D]").astype(np.int64)
+    month_days = (first + 1).astype("datetime64[D]").astype(np.int64) - first_day
+    in_month = days[valid] <= month_days
+    epoch_days = first_day + days[valid] - 1
+    counts = np.bincount((epoch_days[in_month] + 3) % 7, minlength=7).tolist()
+
+    rejected = np.flatnonzero(valid)[~in_month].tolist() + np.flatnonzero(~valid).tolist()
+    # Blank lines and lines with stray whitespace land here too; weekday_counts() strips or skips them
+    fallback_counts, unparsed = weekday_counts(lines[i].decode("utf-8", errors="replace") for i in rejected)
+    return [a + b for a, b in zip(counts, fallback_counts)], unparsed
+
+
+def count_weekdays(path, vectorized=None):
+    """Streams a file of dates and counts them per weekday (Monday first). Returns (counts, unparsed).
+
+    With vectorized (default: when NumPy is installed) the file is parsed in
+    BATCH_BYTES batches with NumPy; otherwise line by line by parse_date().
+    """
+    if vectorized is None:
+        try:
+            import numpy
+            vectorized = True
+        except ImportError:
+            vectorized = False
+
+    if not vectorized:
+        with open(path, "r", encoding="utf-8") as f:
+            return weekday_counts(f)
+
+    counts, unparsed = [0] * 7, 0
+    for batch in _read_batches(path):
+        batch_counts, batch_unparsed = _weekday_counts_numpy(batch)
+        counts = [a + b for a, b in zip(counts, batch_counts)]
+        unparsed += batch_unparsed
+    return counts, unparsed
@@ -0,0 +1,158 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+SQLITE_PRAGMAS = (
+    "PRAGMA mmap_size = 268435456",  # Map up to 256 MB of the file instead of copying pages
+    "PRAGMA cache_size = -65536",  # 64 MB page cache per connection
+    "PRAGMA temp_store = MEMORY",
+)
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per SQLite connection (LRU)
+
+
+def engine_for(path):
+    """Picks the database engine from the file extension."""
+    if path.endswith(".duckdb"):
+        return "duckdb"
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return "sqlite"
+    raise ValueError("Only SQLite (.db) and DuckDB (.duckdb) are supported")
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of connections to one database file.
+
+    SQLite connections are opened read-only through a file: URI when
+    readonly is set. They are tuned with SQLITE_PRAGMAS and keep an LRU of
+    STATEMENT_CACHE_SIZE prepared statements, so repeated queries skip
+    parsing. The first writable open switches the file to WAL, so readers
+    and a writer don't block each other. DuckDB pools share one database
+    handle and lend out cursors; the handle is closed as soon as the last
+    cursor comes back, since DuckDB locks the file against writers from
+    other processes for as long as it is open.
+
+    If the file is replaced (a new inode, e.g. datagen rebuilding it), the
+    pool drops its connections and reconnects to the new file.
+    """
+
+    def __init__(self, path, engine=None, readonly=True, size=4, timeout=30):
+        self.path = path
+        self.engine = engine or engine_for(path)
+        self.readonly = readonly
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._users = 0  # Borrowers plus callers waiting for a connection
+        self._identity = None
+        self._duckdb = None
+        self._lock = threading.Lock()
+
+    def _file_identity(self):
+        if self.engine == "sqlite" and not self.readonly and not os.path.exists(self.path):
+            sqlite3.connect(self.path).close()  # Create the file so it has an identity
+        st = os.stat(self.path)
+        return (st.st_dev, st.st_ino)
+
+    def _open(self):
+        if self.engine == "duckdb":
+            if self._duckdb is None:
+                import duckdb
+                self._duckdb = duckdb.connect(self.path, read_only=self.readonly)
+            return self._duckdb.cursor()
+
+        if self.readonly:
+            uri = "file:" + os.path.abspath(self.path).replace("\\", "/") + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+        else:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            conn.execute("PRAGMA journal_mode = WAL")
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _reset(self):
+        """Closes every idle connection; connections in use are closed when returned."""
+        while True:
+            try:
+                self._idle.get_nowait()[1].close()
+            except queue.Empty:
+                break
+        self._created = 0
+        if self._duckdb is not None:
+            self._duckdb.close()
+            self._duckdb = None
+
+    def _acquire(self):
+        with self._lock:
+            identity = self._file_identity()
+            if identity != self._identity:
+                self._reset()
+                self._identity = identity
+            self._users += 1
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._created < self.size:
+                try:
+                    conn = self._open()
+                except BaseException:
+                    self._users -= 1
+                    raise
+                self._created += 1
+                return identity, conn
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            self._leave()
+            raise TimeoutError(f"No free connection to {self.path} after {self.timeout}s")
+
+    def _leave(self):
+        with self._lock:
+            self._users -= 1
+            if self.engine == "duckdb" and self._users == 0:
+                self._reset()  # Nobody needs the handle; release the file lock
+
+    def _release(self, identity, conn):
+        if self.engine == "sqlite" and conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            current = identity == self._identity
+            if current:
+                self._idle.put((identity, conn))
+        if not current:
+            conn.close()  # Belongs to a file that has since been replaced
+        self._leave()
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection (a cursor-capable object) for the duration of the block."""
+        identity, conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(identity, conn)
+
+    def close(self):
+        with self._lock:
+            self._reset()
+            self._identity = None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path, readonly=True, **kwargs):
+    """Returns the process-wide pool for a database file."""
+    key = (os.path.abspath(path), readonly)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(path, readonly=readonly, **kwargs)
+        return pool
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from atomic_io import atomic_write
+from model_pool import DEFAULT_MODEL, models
+
+CACHE_ROOT = "data/embeddings"
+
+
+def text_key(text, model_name):
+    """Content address of one text's embedding under one model."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Append-only store of embeddings on disk, keyed by text hash + model name.
+
+    vectors.f32 is a raw float32 matrix with one row per distinct text, and
+    keys.log lists the key of each row, one per line, so recording new rows is
+    an append. The key -> row map is kept in memory and only the lines other
+    processes appended since are read. lookup_rows() encodes only the texts
+    that are missing and appends them; embeddings() then reads the rows from a
+    memory map. When the requested texts are one contiguous run of rows (the
+    usual append-only case), the result is a zero-copy view of the mapping.
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL, root=CACHE_ROOT, encode=None):
+        self.model_name = model_name
+        self.directory = os.path.join(root, model_name.replace("/", "__"))
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.keys_path = os.path.join(self.directory, "keys.log")
+        self.meta_path = os.path.join(self.directory, "meta.json")
+        self.encode = encode or (lambda texts: models.encode(texts, name=model_name, convert_to_numpy=True))
+        self._lock = threading.Lock()
+        self._keys = {}  # key -> row
+        self._keys_read = 0  # Bytes of keys.log already in _keys
+        self._dim = None
+
+    def _refresh(self):
+        """Brings the in-memory key map up to date with keys.log."""
+        try:
+            size = os.path.getsize(self.keys_path)
+        except OSError:
+            size = 0
+        if size < self._keys_read:  # Cleared or replaced
+            self._keys, self._keys_read, self._dim = {}, 0, None
+        if self._dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self._dim = json.load(f)["dim"]
+        if size == self._keys_read:
+            return
+
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_read)
+            data = f.read(size - self._keys_read)
+        complete = data.rfind(b"\n") + 1  # A line cut short by a crash is not a row yet
+        for key in data[:complete].decode("ascii").splitlines():
+            self._keys[key] = len(self._keys)
+        self._keys_read += complete
+
+    def _append(self, keys, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self._dim is None:
+            with atomic_write(self.meta_path) as f:
+                json.dump({"model": self.model_name, "dim": int(vectors.shape[1])}, f)
+            self._dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(f"Embedding dimension changed from {self._dim} to {vectors.shape[1]}")
+
+        # Vectors first, then their keys: a crash in between leaves rows without keys, which are dropped here
+        expected_size = len(self._keys) * self._dim * 4
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() != expected_size:
+                f.truncate(expected_size)
+                f.seek(expected_size)
+            f.write(vectors.tobytes())
+        with open(self.keys_path, "ab") as f:
+            if f.tell() != self._keys_read:
+                f.truncate(self._keys_read)
+                f.seek(self._keys_read)
+            f.write("".join(key + "\n" for key in keys).encode("ascii"))
+            self._keys_read = f.tell()
+        for key in keys:
+            self._keys[key] = len(self._keys)
+
+    def _map(self):
+        if not self._keys:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self._keys), self._dim))
+
+    def lookup_rows(self, texts):
+        """Encodes any texts not cached yet and returns (vectors, rows, number_of_texts_encoded).
+
+        vectors is the memory-mapped matrix of every cached embedding, and
+        rows[i] is the row of it holding the embedding of texts[i].
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self._refresh()
+            keys = [text_key(text, self.model_name) for text in texts]
+
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._keys and key not in missing:
+                    missing[key] = text
+
+            if missing:
+                print(f"DEBUG: Encoding {len(missing)} new texts")
+                self._append(list(missing), self.encode(list(missing.values())))
+
+            return self._map(), [self._keys[key] for key in keys], len(missing)
+
+    def vectors(self):
+        """Memory-maps every cached embedding as a read-only (rows, dim) float32 matrix."""
+        with self._lock:
+            self._refresh()
+            return self._map()
+
+    @staticmethod
+    def embeddings(vectors, rows):
+        """The rows of vectors (as returned by lookup_rows) listed in rows, in order."""
+        if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+            return vectors[rows[0]:rows[0] + len(rows)]  # Zero-copy view of the mapping
+        return np.asarray(vectors[rows])
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(model_name=DEFAULT_MODEL):
+    """Returns the process-wide EmbeddingCache for a model."""
+    with _caches_lock:
+        if model_name not in _caches:
+            _caches[model_name] = EmbeddingCache(model_name)
+        return _caches[model_name]
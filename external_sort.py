@@ -0,0 +1,141 @@
+import heapq
+import itertools
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from operator import itemgetter
+
+import json_backend
+
+DEFAULT_RUN_SIZE = int(os.environ.get("SORT_RUN_SIZE", 100_000))  # Records sorted in memory per run
+READ_SIZE = 1024 * 1024
+
+
+def iter_json_records(path, read_size=READ_SIZE):
+    """Yields the records of a JSON array file, or of a JSONL file, without loading the whole file.
+
+    The format is taken from the first non-blank character: "[" starts an
+    array, which is decoded element by element with raw_decode as chunks
+    arrive. Anything else is read as one JSON value per line.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(read_size)
+        while buffer and not buffer.strip():
+            buffer = f.read(read_size)  # Leading blank space
+        position = len(buffer) - len(buffer.lstrip())
+        if buffer[position:position + 1] != "[":
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield json_backend.loads(line)
+            return
+
+        position += 1
+        eof = False
+        while True:
+            # Skip whitespace and separators, topping up the buffer when it runs dry
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+                if position < len(buffer) or eof:
+                    break
+                buffer, position = f.read(read_size), 0
+                eof = not buffer
+            if position >= len(buffer):
+                raise ValueError(f"{path}: unterminated JSON array")
+            if buffer[position] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                # A value is only known to be whole once a delimiter follows it ("2" may be "2.5")
+                complete = eof or (end < len(buffer) and buffer[end] in " \t\r\n,]")
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if complete:
+                yield record
+                position = end
+                continue
+            more = f.read(read_size)
+            eof = not more
+            buffer, position = buffer[position:] + more, 0
+
+
+def sort_key(fields):
+    """Key function comparing records by fields in order, e.g. ("last_name", "first_name")."""
+    return itemgetter(*fields) if len(fields) > 1 else (lambda record: (record[fields[0]],))
+
+
+def _write_run(records, directory):
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".jsonl")
+    with os.fdopen(fd, "wb") as f:
+        for record in records:
+            f.write(json_backend.dumps(record))
+            f.write(b"\n")
+    return path
+
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        for line in f:
+            yield json_backend.loads(line)
+
+
+@contextmanager
+def external_sort(records, key, run_size=DEFAULT_RUN_SIZE, tmp_dir=None):
+    """Sorts an iterable of records that may not fit in memory. Yields an iterator of sorted records.
+
+    Records are sorted run_size at a time; each sorted run is spilled to a
+    JSONL temp file, and the runs are k-way merged lazily with heapq.merge.
+    Like sorted(), the result is stable. Input that fits in a single run is
+    sorted in memory without touching disk. Temp files are removed when the
+    block exits.
+    """
+    records = iter(records)
+    first = sorted(itertools.islice(records, run_size), key=key)
+    if len(first) < run_size:
+        yield iter(first)
+        return
+
+    directory = tempfile.mkdtemp(prefix="sort-runs-", dir=tmp_dir)
+    try:
+        runs = [_write_run(first, directory)]
+        del first
+        while True:
+            run = sorted(itertools.islice(records, run_size), key=key)
+            if not run:
+                break
+            runs.append(_write_run(run, directory))
+        print(f"DEBUG: external sort spilled {len(runs)} runs to {directory}")
+        yield heapq.merge(*(_read_run(path) for path in runs), key=key)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def write_json_array(records, f, indent=4):
+    """Streams records to a text file f as a JSON array laid out like json.dump(list(records), f, indent=indent).
+
+    indent=None writes compact JSON with no whitespace at all. Records are
+    serialized by the fastest installed JSON backend. Returns the number of
+    records written.
+    """
+    count = 0
+    if indent is None:
+        for record in records:
+            f.write("," if count else "[")
+            f.write(json_backend.dumps(record).decode())
+            count += 1
+        f.write("]" if count else "[]")
+        return count
+
+    pad = " " * indent
+    for record in records:
+        f.write(",\n" if count else "[\n")
+        f.write(pad + json_backend.dumps(record, indent).decode().replace("\n", "\n" + pad))
+        count += 1
+    f.write("\n]" if count else "[]")
+    return count
@@ -0,0 +1,75 @@
+import glob
+import heapq
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+HEAD_BATCH_SIZE = 256  # Paths per thread pool task in read_heads
+
+
+def expand_sources(pattern):
+    """Files named by a path: the file itself, every file under a directory, or glob matches."""
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(root, name)
+            for root, _, files in os.walk(pattern)
+            for name in files
+        )
+    if glob.has_magic(pattern):
+        return sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return [pattern] if os.path.isfile(pattern) else []
+
+
+ScanEntry = namedtuple("ScanEntry", ["rel_path", "path", "stat"])
+
+
+def scan_files(root, suffix="", recursive=False):
+    """One os.scandir pass over root: a ScanEntry for every file ending in suffix.
+
+    Each file's stat is taken once here (free on Windows, one syscall
+    elsewhere) and carried along, so sorting or filtering by mtime or size
+    needs no further syscalls. Hidden files and directories are skipped, like
+    glob does. rel_path uses "/" whatever the platform.
+    """
+    found = []
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append((entry.path, prefix + entry.name + "/"))
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    found.append(ScanEntry(prefix + entry.name, entry.path, entry.stat()))
+    return found
+
+
+def newest(entries, k):
+    """The k most recently modified entries, newest first, in O(n log k)."""
+    return heapq.nlargest(k, entries, key=lambda entry: entry.stat.st_mtime_ns)
+
+
+def read_heads(paths, reader, max_workers=None):
+    """reader(path) for every path, overlapped on a thread pool. Results come back in order.
+
+    Paths are handed out in batches, so thousands of small reads don't each
+    pay for a round trip through the executor.
+    """
+    paths = list(paths)
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    if len(paths) <= 1 or workers <= 1:
+        return [reader(path) for path in paths]
+    size = max(1, min(HEAD_BATCH_SIZE, -(-len(paths) // workers)))
+    batches = [paths[i:i + size] for i in range(0, len(paths), size)]
+    with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+        return [result for batch in pool.map(lambda batch: [reader(path) for path in batch], batches)
+                for result in batch]
+
+
+def first_line(path):
+    """First line of a text file, stripped."""
+    with open(path, "r") as f:
+        return f.readline().strip()
@@ -0,0 +1,79 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+MIN_BUFFER_SIZE = 256 * 1024
+MAX_BUFFER_SIZE = 8 * 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024  # Files at least this big are hashed straight from an mmap
+
+
+def buffer_size_for(file_size):
+    """Read size that grows with the file, so big files need few Python-level iterations."""
+    return min(MAX_BUFFER_SIZE, max(MIN_BUFFER_SIZE, file_size // 64))
+
+
+def hash_file(path, algorithms=("sha256",), use_mmap=None):
+    """Hashes a file with one or more algorithms in a single pass. Returns {algorithm: hexdigest}.
+
+    A single algorithm on a small file goes through hashlib.file_digest when
+    available. Otherwise the file is read with a large reusable buffer, or
+    mapped into memory when it is at least MMAP_THRESHOLD bytes, and every
+    block goes to each hasher. hashlib releases the GIL on large updates, so
+    several files can be hashed in parallel threads.
+    """
+    size = os.path.getsize(path)
+    if use_mmap is None:
+        use_mmap = size >= MMAP_THRESHOLD
+    hashers = {name: hashlib.new(name) for name in algorithms}
+    block = buffer_size_for(size)
+
+    with open(path, "rb") as f:
+        if use_mmap and size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, block):
+                        chunk = view[offset:offset + block]
+                        for hasher in hashers.values():
+                            hasher.update(chunk)
+                        chunk.release()
+                finally:
+                    view.release()
+        elif len(hashers) == 1 and hasattr(hashlib, "file_digest"):
+            (name,) = hashers
+            hashers[name] = hashlib.file_digest(f, name)
+        else:
+            buffer = bytearray(block)
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                for hasher in hashers.values():
+                    hasher.update(view[:read])
+
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+
+def hash_files(paths, algorithms=("sha256",), max_workers=None, missing_ok=False):
+    """Hashes many files concurrently on a thread pool. Returns {path: {algorithm: hexdigest}}.
+
+    With missing_ok, files deleted before they could be hashed are left out
+    of the result instead of raising FileNotFoundError.
+    """
+    def hash_one(path):
+        try:
+            return hash_file(path, algorithms)
+        except FileNotFoundError:
+            if not missing_ok:
+                raise
+            return None
+
+    paths = list(paths)
+    if len(paths) <= 1:
+        digests = zip(paths, map(hash_one, paths))
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 2)) as pool:
+            digests = list(zip(paths, pool.map(hash_one, paths)))
+    return {path: digest for path, digest in digests if digest is not None}
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import json_backend
+from atomic_io import atomic_write
+from memo import file_signature
+
+POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", 16))  # Hosts with a kept-alive pool
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 32))  # Connections kept per host
+RETRIES = int(os.environ.get("HTTP_RETRIES", 3))
+BACKOFF = float(os.environ.get("HTTP_BACKOFF", 0.5))  # Waits 0.5s, 1s, 2s, ... between retries
+TIMEOUT = (float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5)), float(os.environ.get("HTTP_READ_TIMEOUT", 60)))
+CHUNK_SIZE = 64 * 1024
+CACHE_FILE = "data/.http-cache.json"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide requests.Session: kept-alive connection pools and retries with backoff."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRIES,
+                backoff_factor=BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class ValidatorCache:
+    """ETag / Last-Modified of past downloads, kept in a JSON sidecar.
+
+    An entry is only used while the file it produced is exactly as the
+    download left it (same mtime and size) and was written in the same
+    format, so a 304 never leaves a stale or foreign file in place.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                return json_backend.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def headers(self, url, output_file, fmt):
+        """Conditional request headers for url, or {} if its output can't be reused."""
+        with self._lock:
+            entry = self._load().get(url)
+        if not entry or entry["output"] != output_file or entry["format"] != fmt:
+            return {}
+        if entry["signature"] != list(file_signature(output_file) or ()):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, output_file, fmt, response):
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        with self._lock:
+            entries = self._load()
+            if etag or last_modified:
+                entries[url] = {
+                    "output": output_file,
+                    "format": fmt,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "signature": list(file_signature(output_file)),
+                }
+            elif entries.pop(url, None) is None:
+                return
+            with atomic_write(self.path, "wb") as f:
+                f.write(json_backend.dumps(entries))
+
+
+validators = ValidatorCache()
+
+
+def download(url, output_file, fmt="pretty", session=None, cache=validators, timeout=TIMEOUT):
+    """Downloads url into output_file; returns {"status", "bytes", "seconds", "not_modified"}.
+
+    The body must be JSON, and is written with a 4-space indent ("pretty")
+    or without whitespace ("compact"); a body that isn't JSON raises
+    ValueError and leaves the file as it was. With fmt "raw" the body is
+    instead streamed to the file unchecked, in CHUNK_SIZE pieces through
+    atomic_write, and never held in memory whole. A known ETag / Last-Modified is
+    sent along, and a 304 answer keeps the existing file without any body
+    transfer. Connection errors and 429/5xx answers are retried with
+    exponential backoff by the session. Raises requests.HTTPError for any
+    other non-200 status.
+    """
+    start = time.perf_counter()
+    session = session or get_session()
+    headers = cache.headers(url, output_file, fmt) if cache else {}
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304 and headers:
+            return {"status": 304, "bytes": 0, "seconds": time.perf_counter() - start, "not_modified": True}
+        if response.status_code != 200:
+            raise requests.HTTPError(f"Status Code: {response.status_code}", response=response)
+
+        size = 0
+        if fmt == "raw":
+            with atomic_write(output_file, "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+        else:
+            body = response.content
+            size = len(body)
+            data = json_backend.loads(body)  # Rejects a body that isn't JSON before anything is written
+            with atomic_write(output_file, "wb") as f:
+                f.write(json_backend.dumps(data, indent=4 if fmt == "pretty" else None))
+
+        if cache:
+            cache.store(url, output_file, fmt, response)
+    return {"status": 200, "bytes": size, "seconds": time.perf_counter() - start, "not_modified": False}
+
+
+MAX_WORKERS = int(os.environ.get("HTTP_MAX_WORKERS", 32))  # Downloads in flight across all hosts
+PER_HOST = int(os.environ.get("HTTP_PER_HOST", 6))  # Downloads in flight per host
+
+
+def output_name(url, directory="data/api-data"):
+    """A stable, distinct file under directory for url, e.g. api.example.com-v1-users-1a2b3c4d.json."""
+    parts = urlsplit(url)
+    slug = re.sub(r"[^A-Za-z0-9.]+", "-", f"{parts.netloc}{parts.path}").strip("-.")[:80]
+    digest = hashlib.sha1(url.encode()).hexdigest()[:8]  # Tells apart URLs differing only in query or case
+    return os.path.join(directory, f"{slug}-{digest}.json")
+
+
+def download_many(jobs, fmt="pretty", max_workers=MAX_WORKERS, per_host=PER_HOST):
+    """Runs download() for each (url, output_file) concurrently. Returns one dict per job, in order.
+
+    Downloads share the pooled session on a thread pool, so wall time is
+    close to the slowest single request; at most per_host of them talk to
+    the same host at once. Each dict holds url, file and either download()'s
+    fields or an "error" message.
+    """
+    session = get_session()
+    limits = {}
+    limits_lock = threading.Lock()
+
+    def fetch(url, output_file):
+        host = urlsplit(url).netloc.lower()
+        with limits_lock:
+            limit = limits.setdefault(host, threading.BoundedSemaphore(min(per_host, POOL_SIZE)))
+        start = time.perf_counter()
+        try:
+            with limit:
+                return {"url": url, "file": output_file, **download(url, output_file, fmt, session=session)}
+        except Exception as e:
+            return {"url": url, "file": output_file, "error": str(e), "seconds": time.perf_counter() - start}
+
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        return list(pool.map(lambda job: fetch(*job), jobs))
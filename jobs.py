@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Heavy tasks (datagen, OCR, git clone) get their own narrow lanes so they can't starve the rest
+DEFAULT_CONCURRENCY = {"A1": 1, "A8": 1, "A9": 1, "B4": 1}
+DEFAULT_LANE_CONCURRENCY = 4
+
+
+def parse_concurrency(spec):
+    """Parses "A1=1,B4=2" into {"A1": 1, "B4": 2}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        limits[name.strip().upper()] = int(value)
+    return limits
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """Runs tasks in the background and keeps their status for /jobs.
+
+    Every task type gets its own lane: a thread pool sized by `concurrency`
+    (or `default_concurrency`) with at most `max_pending` jobs waiting. A burst
+    of slow jobs only fills its own lane, while the other tasks keep running.
+    """
+
+    def __init__(self, run, concurrency=None, default_concurrency=DEFAULT_LANE_CONCURRENCY,
+                 max_pending=100, max_finished=1000):
+        self.run = run
+        self.concurrency = dict(DEFAULT_CONCURRENCY if concurrency is None else concurrency)
+        self.default_concurrency = default_concurrency
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._lanes = {}
+        self._pending = {}
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lane(self, lane):
+        if lane not in self._lanes:
+            workers = self.concurrency.get(lane, self.default_concurrency)
+            self._lanes[lane] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"job-{lane}")
+            self._pending[lane] = 0
+        return self._lanes[lane]
+
+    def submit(self, task_description, lane):
+        """Queues a task and returns its job record. Raises QueueFull if the lane is backed up."""
+        job = {
+            "id": uuid.uuid4().hex,
+            "task": lane,
+            "description": task_description,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "duration": None,
+            "result": None,
+        }
+        with self._lock:
+            executor = self._lane(lane)
+            if self._pending[lane] >= self.max_pending:
+                raise QueueFull(f"Too many queued {lane} jobs, try again later")
+            self._pending[lane] += 1
+            self._jobs[job["id"]] = job
+            self._trim()
+            executor.submit(self._execute, job)
+        return dict(job)
+
+    def _execute(self, job):
+        with self._lock:
+            self._pending[job["task"]] -= 1
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+        try:
+            result = self.run(job["description"])
+        except Exception as e:
+            result = {"status": "error", "error": "Internal Server Error", "details": str(e)}
+
+        with self._lock:
+            job["finished_at"] = time.time()
+            job["duration"] = round(job["finished_at"] - job["started_at"], 3)
+            job["status"] = "success" if result.get("status") == "success" else "error"
+            job["result"] = result
+
+    def _trim(self):
+        # Forget the oldest finished jobs once we hold too many
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished_at"] is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def lanes(self):
+        """Queued job counts and worker limits per lane."""
+        with self._lock:
+            return {
+                lane: {"workers": self.concurrency.get(lane, self.default_concurrency), "queued": self._pending[lane]}
+                for lane in self._lanes
+            }
+
+
+def create_queue(run):
+    """Builds the app's JobQueue, honouring TASK_CONCURRENCY="A1=1,B4=2" and TASK_QUEUE_SIZE."""
+    concurrency = dict(DEFAULT_CONCURRENCY)
+    concurrency.update(parse_concurrency(os.environ.get("TASK_CONCURRENCY", "")))
+    return JobQueue(
+        run,
+        concurrency=concurrency,
+        default_concurrency=int(os.environ.get("TASK_DEFAULT_CONCURRENCY", DEFAULT_LANE_CONCURRENCY)),
+        max_pending=int(os.environ.get("TASK_QUEUE_SIZE", 100)),
+    )
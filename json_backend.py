@@ -0,0 +1,133 @@
+import json
+import os
+
+# JSON_BACKEND=orjson|msgspec|json picks one explicitly; by default the fastest installed one is used
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+def _select(name):
+    for candidate in BACKENDS if name == "auto" else (name,):
+        if candidate == "json":
+            return "json", None
+        try:
+            return candidate, __import__(candidate)
+        except ImportError:
+            if name != "auto":
+                raise
+    return "json", None
+
+
+backend, _module = _select(os.environ.get("JSON_BACKEND", "auto"))
+_contacts_decoder = None
+
+
+def use_backend(name):
+    """Switches the process to another backend ("auto" for the fastest installed). Returns its name."""
+    global backend, _module, _contacts_decoder
+    backend, _module = _select(name)
+    _contacts_decoder = None
+    return backend
+
+
+def loads(data):
+    """Parses JSON from str or bytes."""
+    if backend == "orjson":
+        return _module.loads(data)
+    if backend == "msgspec":
+        return _module.json.decode(data)
+    return json.loads(data)
+
+
+def _reindent(data, indent):
+    """Turns two-space indented JSON into indent-space indented JSON with a few bytes.replace passes.
+
+    JSON text never holds raw newlines or tabs inside strings, so every run
+    of spaces after a newline is indentation. Levels are swapped for tabs
+    from the deepest up, so a shallower pattern never matches a deeper line,
+    and the tabs are then widened.
+    """
+    depth = 0
+    while b"\n" + b"  " * (depth + 1) in data:
+        depth += 1
+    for level in range(depth, 0, -1):
+        data = data.replace(b"\n" + b"  " * level, b"\n" + b"\t" * level)
+    return data.replace(b"\t", b" " * indent)
+
+
+def _default(obj):
+    if isinstance(obj, Contact):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent=None):
+    """Serializes obj to UTF-8 bytes: compact without indent, else laid out like json.dumps(indent=indent).
+
+    Contacts (and msgspec structs) are written as objects of their fields.
+    orjson only indents by two spaces, so its output is re-indented (see
+    _reindent). Non-ASCII text is written as is by every backend.
+    """
+    if backend == "orjson":
+        if indent is None:
+            return _module.dumps(obj, default=_default)
+        data = _module.dumps(obj, default=_default, option=_module.OPT_INDENT_2)
+        return data if indent == 2 else _reindent(data, indent)
+    if backend == "msgspec":
+        data = _module.json.encode(obj, enc_hook=_default)
+        return data if indent is None else _module.json.format(data, indent=indent)
+    if indent is None:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+    return json.dumps(obj, indent=indent, ensure_ascii=False, default=_default).encode()
+
+
+CONTACT_FIELDS = ("first_name", "last_name", "email")
+
+
+class Contact:
+    """A decoded contacts.json entry; __slots__ keeps 100k of them far smaller than dicts."""
+
+    __slots__ = CONTACT_FIELDS
+
+    def __init__(self, first_name, last_name, email):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.email = email
+
+    def to_dict(self):
+        return {"first_name": self.first_name, "last_name": self.last_name, "email": self.email}
+
+
+def decode_contacts(data):
+    """Decodes a JSON array of contacts into slotted objects, or returns None if any entry has other keys.
+
+    msgspec validates and builds its own (also slotted) Struct objects in C;
+    other backends parse to dicts, check each one's keys and build Contact
+    objects. Either way entries have first_name, last_name and email
+    attributes. A missing or extra field returns None, so callers can fall
+    back to plain dicts without losing data.
+    """
+    global _contacts_decoder
+    if backend == "msgspec":
+        if _contacts_decoder is None:
+            ContactStruct = _module.defstruct(
+                "ContactStruct", [("first_name", str), ("last_name", str), ("email", str)],
+                forbid_unknown_fields=True,
+            )
+            _contacts_decoder = _module.json.Decoder(list[ContactStruct])
+        try:
+            return _contacts_decoder.decode(data)
+        except _module.DecodeError:  # Includes ValidationError
+            return None
+
+    try:
+        records = loads(data)
+    except ValueError:
+        return None  # Not a single JSON document, e.g. JSONL
+    if not isinstance(records, list):
+        return None
+    contacts = []
+    for record in records:
+        if not isinstance(record, dict) or record.keys() != set(CONTACT_FIELDS):
+            return None
+        contacts.append(Contact(record["first_name"], record["last_name"], record["email"]))
+    return contacts
@@ -0,0 +1,137 @@
+import os
+import time
+from contextlib import contextmanager
+
+from db_pool import get_pool
+from hashing import hash_files
+
+MANIFEST_DB = "data/hash-manifest.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (path, algorithm)
+)
+"""
+
+
+def stat_signature(path):
+    """(size, mtime_ns, inode) of a file. Any change means the file must be rehashed."""
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class HashManifest:
+    """SQLite record of file digests, trusted for as long as a file's stat signature is unchanged."""
+
+    def __init__(self, db_path=MANIFEST_DB):
+        self.db_path = db_path
+
+    @contextmanager
+    def _connect(self):
+        with get_pool(self.db_path, readonly=False).connection() as conn:
+            conn.execute(SCHEMA)
+            yield conn
+
+    def _is_own_file(self, path):
+        own = os.path.abspath(self.db_path)
+        return os.path.abspath(path) in (own, own + "-journal", own + "-wal", own + "-shm")
+
+    def _known(self, conn, algorithm):
+        rows = conn.execute("SELECT path, size, mtime_ns, inode, digest FROM files WHERE algorithm = ?", (algorithm,))
+        return {path: ((size, mtime_ns, inode), digest) for path, size, mtime_ns, inode, digest in rows}
+
+    def _record(self, conn, algorithm, entries):
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO files (path, algorithm, size, mtime_ns, inode, digest, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(path, algorithm, *signature, digest, now) for path, signature, digest in entries],
+        )
+
+    def digests(self, paths, algorithm="sha256"):
+        """Returns {path: (digest, from_manifest)}, hashing only files that changed, concurrently."""
+        signatures = {path: stat_signature(path) for path in paths}
+        with self._connect() as conn:
+            results, stale = {}, []
+            for path, signature in signatures.items():
+                row = conn.execute(
+                    "SELECT size, mtime_ns, inode, digest FROM files WHERE path = ? AND algorithm = ?",
+                    (os.path.normpath(path), algorithm),
+                ).fetchone()
+                if row and tuple(row[:3]) == signature:
+                    results[path] = (row[3], True)
+                else:
+                    stale.append(path)
+
+            entries = []
+            for path, digests in hash_files(stale, (algorithm,)).items():
+                results[path] = (digests[algorithm], False)
+                # Only trust the digest if the file didn't change while it was being hashed
+                if stat_signature(path) == signatures[path]:
+                    entries.append((os.path.normpath(path), signatures[path], digests[algorithm]))
+            if entries:
+                with conn:
+                    self._record(conn, algorithm, entries)
+            return results
+
+    def verify(self, root="data", algorithm="sha256", exclude=()):
+        """Walks root and rehashes only files whose stat signature changed since the last check.
+
+        Returns a report listing new, modified (digest differs), touched
+        (signature changed but digest didn't), missing and unchanged files.
+        Paths in exclude (e.g. where the report itself is written) are
+        skipped like the manifest's own files. A file deleted before it is
+        hashed counts as missing.
+        """
+        excluded = {os.path.abspath(path) for path in exclude}
+        current = {}
+        for directory, _, files in os.walk(root):
+            for name in files:
+                path = os.path.normpath(os.path.join(directory, name))
+                if self._is_own_file(path) or os.path.abspath(path) in excluded:
+                    continue
+                try:
+                    current[path] = stat_signature(path)
+                except OSError:
+                    continue  # Deleted while we were walking
+
+        with self._connect() as conn:
+            prefix = os.path.normpath(root) + os.sep
+            known = {path: entry for path, entry in self._known(conn, algorithm).items() if path.startswith(prefix)}
+            stale = [path for path, signature in current.items() if known.get(path, (None,))[0] != signature]
+            digests = hash_files(stale, (algorithm,), missing_ok=True) if stale else {}
+            for path in [path for path in stale if path not in digests]:
+                del current[path]  # Deleted since the walk
+            stale = [path for path in stale if path in digests]
+
+            report = {"new": [], "modified": [], "touched": [], "missing": [], "unchanged": 0}
+            entries = []
+            for path in stale:
+                digest = digests[path][algorithm]
+                entries.append((path, current[path], digest))
+                if path not in known:
+                    report["new"].append(path)
+                elif known[path][1] != digest:
+                    report["modified"].append(path)
+                else:
+                    report["touched"].append(path)
+            report["unchanged"] = len(current) - len(stale)
+            report["missing"] = sorted(set(known) - set(current))
+
+            with conn:
+                self._record(conn, algorithm, entries)
+                conn.executemany(
+                    "DELETE FROM files WHERE path = ? AND algorithm = ?",
+                    [(path, algorithm) for path in report["missing"]],
+                )
+            return report
+
+
+manifest = HashManifest()
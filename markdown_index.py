@@ -0,0 +1,73 @@
+from atomic_io import atomic_write
+from file_scan import read_heads, scan_files
+import json_backend
+
+HEAD_BLOCK_SIZE = 4096
+
+
+def first_h1(path, block_size=HEAD_BLOCK_SIZE):
+    """Title of the first "# " line of a file, reading only as many blocks as it takes to find it."""
+    with open(path, "rb") as f:
+        pending = b""
+        while True:
+            block = f.read(block_size)
+            lines = (pending + block).split(b"\n")
+            pending = lines.pop() if block else b""  # May continue in the next block
+            for line in lines:
+                text = line.decode("utf-8", errors="replace").strip()
+                if text.startswith("# "):
+                    return text[2:].strip()
+            if not block:
+                return None
+
+
+def _load_json(path):
+    try:
+        with open(path, "rb") as f:
+            return json_backend.loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def build_index(root, index_path, state_path):
+    """Maps every Markdown file under root to its first H1 title and merges the result into index_path.
+
+    Files are found in one scandir pass. state_path is a sidecar of
+    {relative path: [mtime_ns, size, title]}; only files whose mtime or size
+    changed since the last run are opened, on a thread pool. The index keeps its existing entries in place, and is only rewritten when an
+    entry was added, changed or removed. Returns counts of what was done.
+    """
+    state = _load_json(state_path)
+    new_state, changed = {}, []
+    for entry in scan_files(root, ".md", recursive=True):
+        st = entry.stat
+        known = state.get(entry.rel_path)
+        if known and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+            new_state[entry.rel_path] = known
+        else:
+            changed.append(entry)
+
+    # Head reads of changed files overlap on a thread pool
+    for entry, title in zip(changed, read_heads([entry.path for entry in changed], first_h1)):
+        new_state[entry.rel_path] = [entry.stat.st_mtime_ns, entry.stat.st_size, title]
+
+    titles = {rel_path: entry[2] for rel_path, entry in new_state.items() if entry[2] is not None}
+    current = _load_json(index_path)
+    merged = {rel_path: titles[rel_path] for rel_path in current if rel_path in titles}
+    for rel_path in sorted(titles.keys() - merged.keys()):
+        merged[rel_path] = titles[rel_path]
+
+    written = merged != current or list(merged) != list(current)
+    if written:
+        with atomic_write(index_path, "wb") as f:
+            f.write(json_backend.dumps(merged, indent=4))
+    if new_state != state:
+        with atomic_write(state_path, "wb") as f:
+            f.write(json_backend.dumps(new_state))
+
+    return {
+        "files": len(new_state),
+        "read": len(changed),
+        "removed": len(state.keys() - new_state.keys()),
+        "written": written,
+    }
@@ -0,0 +1,137 @@
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def file_signature(path, content_hash=False):
+    """(mtime_ns, size[, sha256]) of a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not content_hash:
+        return (st.st_mtime_ns, st.st_size)
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            digest = hashlib.file_digest(f, "sha256")
+        else:  # Python < 3.11
+            digest = hashlib.sha256()
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return (st.st_mtime_ns, st.st_size, digest.hexdigest())
+
+
+def fingerprint(paths, exclude=(), content_hash=False):
+    """Signature of a set of input files and directories (walked recursively)."""
+    excluded = {os.path.abspath(p) for p in exclude}
+    parts = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    if os.path.abspath(file_path) not in excluded:
+                        parts.append((file_path, file_signature(file_path, content_hash)))
+        else:
+            parts.append((path, file_signature(path, content_hash)))
+    return tuple(parts)
+
+
+class ResultCache:
+    """Bounded LRU of task results with hit/miss counters."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _count(self, task, outcome):
+        counters = self._counters.setdefault(task, {"hits": 0, "misses": 0, "evictions": 0})
+        counters[outcome] += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._count(evicted[0], "evictions")
+
+    def record(self, task, hit):
+        with self._lock:
+            self._count(task, "hits" if hit else "misses")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = sum(c["hits"] for c in self._counters.values())
+            misses = sum(c["misses"] for c in self._counters.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                "tasks": {task: dict(c) for task, c in self._counters.items()},
+            }
+
+
+results = ResultCache(max_entries=int(os.environ.get("MEMO_MAX_ENTRIES", 256)))
+
+
+def memoize(inputs, outputs=(), content_hash=None, cache=results):
+    """Skips a handler when its inputs and outputs are unchanged since its last success.
+
+    inputs/outputs are lists of paths, or callables that build them from the
+    handler's arguments. The key is the handler name, its arguments and a
+    SHA-256 digest of the inputs' (mtime, size) fingerprint, which includes a
+    SHA-256 of their contents when content_hash is true (default:
+    MEMO_CONTENT_HASH=1). A hit also requires the
+    outputs to be exactly as that run left them, so a task whose output was
+    overwritten by another run is computed again.
+    """
+    if content_hash is None:
+        content_hash = os.environ.get("MEMO_CONTENT_HASH", "0") == "1"
+
+    def decorator(handler):
+        name = handler.__name__
+
+        @functools.wraps(handler)
+        def wrapper(*args):
+            input_paths = inputs(*args) if callable(inputs) else inputs
+            output_paths = outputs(*args) if callable(outputs) else outputs
+            # Only a digest is kept: the fingerprint has one entry per input file
+            signature = fingerprint(input_paths, exclude=output_paths, content_hash=content_hash)
+            key = (name, args, hashlib.sha256(repr(signature).encode()).hexdigest())
+
+            entry = cache.get(key)
+            if entry is not None and entry[1] == fingerprint(output_paths):
+                cache.record(name, hit=True)
+                print(f"DEBUG: {name} inputs unchanged, reusing result")
+                return dict(entry[0], cached=True)
+
+            cache.record(name, hit=False)
+            result = handler(*args)
+            if result.get("status") == "success":
+                # Keyed on the inputs as they were before the run, so edits made meanwhile still miss
+                cache.put(key, (result, fingerprint(output_paths)))
+            return result
+
+        wrapper.uncached = handler
+        return wrapper
+
+    return decorator
@@ -0,0 +1,122 @@
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # Memory stats fall back to parameter size only
+    psutil = None
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+
+def load_sentence_transformer(name):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+def model_size_bytes(model):
+    """Bytes held by a torch model's parameters and buffers (0 if it is not a torch model)."""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def rss_bytes():
+    return psutil.Process().memory_info().rss if psutil else None
+
+
+class ModelPool:
+    """Process-wide cache of embedding models.
+
+    Each model is loaded once, on first use or by warm(), and shared by every
+    request. encode() runs behind a per-model semaphore, so at most
+    `max_concurrency` requests use a model at a time and torch threads are not
+    oversubscribed.
+    """
+
+    def __init__(self, loader=load_sentence_transformer, max_concurrency=1):
+        self.loader = loader
+        self.max_concurrency = max_concurrency
+        self._models = {}
+        self._slots = {}
+        self._stats = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def _load_lock(self, name):
+        with self._lock:
+            return self._load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name=DEFAULT_MODEL):
+        """Returns the loaded model, loading it on first use."""
+        model = self._models.get(name)
+        if model is None:
+            model = self._load(name)
+        with self._lock:
+            self._stats[name]["hits"] += 1
+        return model
+
+    def _load(self, name):
+        with self._load_lock(name):
+            model = self._models.get(name)  # Another thread may have loaded it meanwhile
+            if model is not None:
+                return model
+
+            print(f"DEBUG: Loading model {name}")
+            rss_before = rss_bytes()
+            start = time.perf_counter()
+            model = self.loader(name)
+            load_seconds = time.perf_counter() - start
+            rss_after = rss_bytes()
+
+            with self._lock:
+                self._slots[name] = threading.BoundedSemaphore(self.max_concurrency)
+                self._stats[name] = {
+                    "load_seconds": round(load_seconds, 3),
+                    "parameter_bytes": model_size_bytes(model),
+                    "rss_delta_bytes": rss_after - rss_before if rss_before is not None else None,
+                    "loaded_at": time.time(),
+                    "hits": 0,
+                    "encode_calls": 0,
+                    "encode_seconds": 0.0,
+                }
+                self._models[name] = model
+            return model
+
+    def encode(self, texts, name=DEFAULT_MODEL, **kwargs):
+        """Encodes texts with a shared model, waiting for a free slot if it is busy."""
+        model = self.get(name)
+        with self._slots[name]:
+            start = time.perf_counter()
+            embeddings = model.encode(texts, **kwargs)
+            elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats[name]["encode_calls"] += 1
+            self._stats[name]["encode_seconds"] += elapsed
+        return embeddings
+
+    def warm(self, names=(DEFAULT_MODEL,), background=True):
+        """Loads models ahead of the first request, in a daemon thread by default."""
+        def load_all():
+            for name in names:
+                try:
+                    self._load(name)
+                except Exception as e:
+                    print(f"DEBUG: Failed to warm model {name} -> {e}")
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Load time, memory footprint and usage counters for every loaded model."""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+models = ModelPool()
@@ -0,0 +1,139 @@
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+
+from memo import file_signature
+
+SQL_TOKEN = re.compile(
+    r"""(?P<literal>'(?:[^']|'')*'|"(?:[^"]|"")*")"""
+    r"""|(?P<comment>--[^\n]*|/\*.*?\*/)"""
+    r"""|(?P<space>\s+)""",
+    re.DOTALL,
+)
+
+
+def normalize_sql(sql):
+    """Canonical text of a query: comments dropped, whitespace collapsed, keywords and names lowercased.
+
+    Quoted literals and identifiers are kept verbatim, so 'Gold' and 'gold'
+    stay different queries.
+    """
+    parts, position = [], 0
+    for match in SQL_TOKEN.finditer(sql):
+        parts.append(sql[position:match.start()].lower())
+        if match.lastgroup == "literal":
+            parts.append(match.group())
+        else:
+            parts.append(" ")
+        position = match.end()
+    parts.append(sql[position:].lower())
+    return re.sub(r" +", " ", "".join(parts)).strip().rstrip(";").strip()
+
+
+def rows_size(rows):
+    """Rough in-memory footprint of a list of row tuples, in bytes."""
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row)) for row in rows)
+
+
+class QueryCache:
+    """Byte-bounded LRU of query results, keyed by normalized SQL and the database's fingerprint.
+
+    The fingerprint is the (mtime, size) of the database file and its
+    write-ahead log, plus, for SQLite, a generation counter bumped whenever a
+    connection's PRAGMA data_version moves (a commit by another connection).
+    Any write therefore makes every cached result of that database miss.
+    Results bigger than max_entry_bytes are never cached.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self._entries = OrderedDict()  # key -> (columns, rows, size)
+        self._bytes = 0
+        self._versions = {}  # id(connection) -> last PRAGMA data_version seen
+        self._generations = defaultdict(int)
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "too_large": 0}
+        self._lock = threading.Lock()
+
+    def _generation(self, conn, path):
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        with self._lock:
+            # A connection seen for the first time may have missed a commit, so it bumps too
+            if self._versions.get(id(conn)) != version:
+                self._versions[id(conn)] = version
+                self._generations[path] += 1
+            return self._generations[path]
+
+    def fingerprint(self, conn, path, engine):
+        """Identifies the current contents of a database; changes whenever it is written."""
+        path = os.path.abspath(path)
+        wal = path + (".wal" if engine == "duckdb" else "-wal")
+        parts = (file_signature(path), file_signature(wal))
+        if engine == "sqlite":
+            parts += (self._generation(conn, path),)
+        return parts
+
+    def key(self, conn, path, engine, sql, *extra):
+        return (os.path.abspath(path), normalize_sql(sql), extra, self.fingerprint(conn, path, engine))
+
+    def get(self, key):
+        """Returns (columns, rows) or None, counting the hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[0], entry[1]
+
+    def put(self, key, columns, rows, size=None):
+        size = rows_size(rows) if size is None else size
+        with self._lock:
+            if size > self.max_entry_bytes:
+                self._counters["too_large"] += 1
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (columns, rows, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._counters["evictions"] += 1
+            return True
+
+    def query(self, conn, path, engine, sql):
+        """Runs sql and fetches all rows, or serves them from the cache. Returns (columns, rows, hit)."""
+        key = self.key(conn, path, engine, sql)
+        cached = self.get(key)
+        if cached is not None:
+            return cached + (True,)
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+        columns = [column[0] for column in cursor.description or ()]
+        self.put(key, columns, rows)
+        return columns, rows, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                **self._counters,
+                "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else None,
+            }
+
+
+queries = QueryCache(max_bytes=int(os.environ.get("QUERY_CACHE_MB", 64)) * 1024 * 1024)
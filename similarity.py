@@ -0,0 +1,55 @@
+import numpy as np
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # Bytes for one block of the similarity matrix
+
+
+def normalize(embeddings):
+    """Returns a float32 copy of embeddings with every row scaled to unit length."""
+    vectors = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def top_similar_pairs(embeddings, k=1, memory_budget=DEFAULT_MEMORY_BUDGET, normalized=False):
+    """Finds the k most cosine-similar pairs (i < j) among the rows of embeddings.
+
+    Rows are normalized once, then the upper triangle of the similarity matrix
+    is computed a block of rows at a time with one matrix multiply per block.
+    Block height is chosen so a block fits in memory_budget bytes, and a running
+    top-k is kept between blocks. Returns [(score, i, j), ...], best first.
+    """
+    vectors = embeddings if normalized else normalize(embeddings)
+    n = len(vectors)
+    if n < 2 or k < 1:
+        return []
+
+    rows_per_block = max(1, int(memory_budget // (4 * n)))
+    best_scores = np.empty(0, dtype=np.float32)
+    best_i = np.empty(0, dtype=np.int64)
+    best_j = np.empty(0, dtype=np.int64)
+
+    for start in range(0, n - 1, rows_per_block):
+        stop = min(start + rows_per_block, n - 1)
+        rows = stop - start
+
+        # Only columns >= start can pair with these rows as j > i
+        sims = vectors[start:stop] @ vectors[start:].T
+        sims[np.tril_indices(rows)] = -np.inf  # Drop the diagonal and j < i
+
+        flat = sims.ravel()
+        take = min(k, flat.size)
+        candidates = np.argpartition(flat, -take)[-take:]
+        candidates = candidates[np.isfinite(flat[candidates])]
+        width = sims.shape[1]
+
+        best_scores = np.concatenate([best_scores, flat[candidates]])
+        best_i = np.concatenate([best_i, candidates // width + start])
+        best_j = np.concatenate([best_j, candidates % width + start])
+        if len(best_scores) > k:
+            keep = np.argpartition(best_scores, -k)[-k:]
+            best_scores, best_i, best_j = best_scores[keep], best_i[keep], best_j[keep]
+
+    order = np.argsort(-best_scores, kind="stable")
+    return [(float(best_scores[o]), int(best_i[o]), int(best_j[o])) for o in order]
@@ -0,0 +1,188 @@
+import csv
+import json
+import os
+import threading
+import time
+
+from atomic_io import atomic_write
+from query_cache import rows_size
+
+BATCH_SIZE = 1000
+MAX_ROWS = int(os.environ.get("SQL_MAX_ROWS", 1_000_000))
+TIMEOUT = float(os.environ.get("SQL_TIMEOUT", 60))
+
+TEXT_FORMATS = ("text", "csv", "jsonl")
+ARROW_FORMATS = ("parquet", "arrow")
+EXTENSIONS = {"text": ".txt", "csv": ".csv", "jsonl": ".jsonl", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+def output_path(base, fmt):
+    """data/sql-results + the extension of the format."""
+    return base + EXTENSIONS[fmt]
+
+
+class _Batches:
+    """fetchmany batches of at most max_rows rows in total.
+
+    One row past the limit is fetched to tell a result of exactly max_rows
+    rows from a longer one; it is kept in extra and not yielded.
+    """
+
+    def __init__(self, cursor, batch_size, max_rows, deadline):
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.deadline = deadline
+        self.extra = None
+
+    @property
+    def truncated(self):
+        return self.extra is not None
+
+    def __iter__(self):
+        fetched = 0
+        while True:
+            if time.monotonic() > self.deadline:
+                raise QueryTimeout("Query exceeded its time limit while fetching results")
+            rows = self.cursor.fetchmany(min(self.batch_size, self.max_rows - fetched + 1))
+            if not rows:
+                return
+            if fetched + len(rows) > self.max_rows:
+                self.extra = rows.pop()
+                if rows:
+                    yield rows
+                return
+            fetched += len(rows)
+            yield rows
+
+
+def _write_text(f, fmt, columns, batches):
+    writer = csv.writer(f) if fmt == "csv" else None
+    if writer and columns:
+        writer.writerow(columns)
+
+    count = 0
+    for rows in batches:
+        if fmt == "text":
+            f.writelines(str(row) + "\n" for row in rows)
+        elif fmt == "csv":
+            writer.writerows(rows)
+        else:
+            f.writelines(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+        count += len(rows)
+    return count
+
+
+def _write_arrow(cursor, f, fmt, batch_size, max_rows, deadline):
+    import pyarrow as pa
+
+    reader = cursor.fetch_record_batch(batch_size)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(f, reader.schema)
+    else:
+        writer = pa.ipc.new_file(f, reader.schema)
+
+    count, truncated = 0, False
+    with writer:
+        for batch in reader:
+            if time.monotonic() > deadline:
+                raise QueryTimeout("Query exceeded its time limit while fetching results")
+            if count + batch.num_rows > max_rows:
+                batch = batch.slice(0, max_rows - count)
+                truncated = True
+            if batch.num_rows:
+                writer.write_batch(batch)
+            count += batch.num_rows
+            if truncated:
+                break
+    return count, truncated
+
+
+class _Collector:
+    """Copies the rows of batches passing through, until they add up to more than max_bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.rows = []
+        self.size = 0
+
+    def wrap(self, batches):
+        for batch in batches:
+            if self.rows is not None:
+                self.size += rows_size(batch)
+                if self.size > self.max_bytes:
+                    self.rows = None  # Too big to cache, stop copying
+                else:
+                    self.rows.extend(batch)
+            yield batch
+
+
+def format_error(fmt, engine):
+    """Why fmt can't be exported from an engine's database, or None if it can."""
+    if fmt not in TEXT_FORMATS + ARROW_FORMATS:
+        return f"Unknown output format: {fmt}"
+    if fmt in ARROW_FORMATS and engine != "duckdb":
+        return f"{fmt} output is only supported for DuckDB databases"
+    return None
+
+
+def export_query(conn, sql_query, path, fmt="text", engine="sqlite",
+                 batch_size=BATCH_SIZE, max_rows=MAX_ROWS, timeout=TIMEOUT, cache=None, cache_key=None):
+    """Runs a query and streams its rows to path in fetchmany batches. Returns (row count, truncated, cached).
+
+    At most max_rows rows are written; truncated tells whether the query had
+    more. A query still running or fetching after timeout seconds is
+    interrupted and raises QueryTimeout; the previous output file is left
+    untouched. Parquet and Arrow IPC need DuckDB and pyarrow. Raises
+    ValueError for a format the engine can't export (see format_error).
+
+    With a QueryCache and a key, text formats are served from cached rows
+    when possible, and results small enough to cache are kept for next time.
+    A truncated result is cached with its one extra row.
+    """
+    error = format_error(fmt, engine)
+    if error:
+        raise ValueError(error)
+
+    if cache is not None and fmt in TEXT_FORMATS:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            columns, rows = cached
+            with atomic_write(path, "w", encoding="utf-8") as f:
+                return _write_text(f, fmt, columns, [rows[:max_rows]]), len(rows) > max_rows, True
+
+    deadline = time.monotonic() + timeout
+    timer = threading.Timer(timeout, conn.interrupt)
+    timer.daemon = True
+    timer.start()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql_query)
+        if fmt in ARROW_FORMATS:
+            with atomic_write(path, "wb") as f:
+                return _write_arrow(cursor, f, fmt, batch_size, max_rows, deadline) + (False,)
+
+        columns = [column[0] for column in cursor.description or ()]
+        batches = fetched = _Batches(cursor, batch_size, max_rows, deadline)
+        collector = _Collector(cache.max_entry_bytes) if cache is not None else None
+        if collector is not None:
+            batches = collector.wrap(batches)
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            count = _write_text(f, fmt, columns, batches)
+        if collector is not None and collector.rows is not None:
+            if fetched.truncated:
+                collector.rows.append(fetched.extra)
+                collector.size += rows_size([fetched.extra])
+            cache.put(cache_key, columns, collector.rows, collector.size)
+        return count, fetched.truncated, False
+    except Exception as e:
+        if time.monotonic() > deadline and not isinstance(e, QueryTimeout):
+            raise QueryTimeout(f"Query interrupted after {timeout}s") from e
+        raise
+    finally:
+        timer.cancel()
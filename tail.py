@@ -0,0 +1,44 @@
+import os
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def tail_lines(path, num_lines, block_size=DEFAULT_BLOCK_SIZE, encoding="utf-8"):
+    """Returns the last num_lines non-blank lines of a file, stripped, in file order.
+
+    Reads fixed-size blocks backwards from the end of the file and stops as
+    soon as it has enough lines. The cost depends on num_lines, not on the file
+    size. Blocks are split on b"\\n" before decoding. A UTF-8 multi-byte
+    sequence never contains that byte, so characters cut by a block boundary
+    are only decoded once the whole line has been read.
+    """
+    lines = []
+    if num_lines <= 0:
+        return lines
+
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        partial = b""  # Start of the earliest line seen so far, possibly incomplete
+
+        while position > 0 and len(lines) < num_lines:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            parts = (f.read(size) + partial).split(b"\n")
+            partial = parts[0]
+
+            for raw in reversed(parts[1:]):
+                line = raw.decode(encoding).strip()
+                if line:
+                    lines.append(line)
+                    if len(lines) == num_lines:
+                        break
+
+        # Reached the start of the file: what is left is the first line
+        if position == 0 and len(lines) < num_lines:
+            line = partial.decode(encoding).strip()
+            if line:
+                lines.append(line)
+
+    lines.reverse()
+    return lines
@@ -1,96 +1,24 @@
-import datetime
 import os
 import subprocess
 import shutil
 import re
+from atomic_io import atomic_write
+from memo import memoize
+from task_router import TaskRegistry
+
+tasks = TaskRegistry()
+task = tasks.register
 
 def execute_task(task_description):
     """Parses the task and executes the corresponding function."""
-    
-    task_description_lower = task_description.lower()
-    
-    # Task A1: Install uv and run datagen.py
-    if "install uv" in task_description_lower and "datagen.py" in task_description_lower:
-        return run_A1(task_description)
-    
-    # Task A2: Format /data/format.md using Prettier
-    if "format" in task_description_lower and "prettier" in task_description_lower:
-        return run_A2()
+    return tasks.dispatch(task_description)
 
-    # Task A3: Count Wednesdays in /data/dates.txt
-    if "wednesday" in task_description_lower and "/data/dates.txt" in task_description_lower:
-        return run_A3()
-    
-    # Task A4: Sort contacts.json by last_name, then first_name
-    if "sort" in task_description_lower and "contacts.json" in task_description_lower:
-        return run_A4()
-    
-    # Task A5: Extract recent log entries
-    if "recent logs" in task_description_lower and "logs-recent.txt" in task_description_lower:
-        return run_A5()
-    
-      # Task A6: Create an index of Markdown files
-    if "create index" in task_description_lower and "markdown" in task_description_lower:
-        return run_A6()
-    
-    # Task A7: Extract sender's email address from /data/email.txt using LLM
-    if "extract" in task_description_lower and "email sender" in task_description_lower:
-        return run_A7()
-    
-    # Task A8: Extract credit card number from /data/credit-card.png
-    if "extract" in task_description_lower and "credit card" in task_description_lower:
-        return run_A8()
-    
-    # Task A9: Find most similar comments in /data/comments.txt
-    if "find" in task_description_lower and "similar comments" in task_description_lower:
-        return run_A9()
-    
-    # Task A10: Calculate total sales for Gold tickets
-    if "total sales" in task_description_lower and "gold ticket" in task_description_lower:
-        return run_A10()
-    
-    # ✅ Task B3: Fetch data from an API and save it to /data/api-data.json
-    if "fetch" in task_description_lower and "api" in task_description_lower:
-        return run_B3(task_description)
-
-    # ✅ Task B4: Clone a Git repository and commit a change
-    if "clone" in task_description_lower and "git" in task_description_lower:
-        return run_B4(task_description)
-    
-    # ✅ Task B5
-    if "run sql" in task_description_lower and "on" in task_description_lower and "query" in task_description_lower:
-        return run_B5(task_description)
-    
-    # ✅ Task B6
-    if "list files" in task_description_lower and "directory" in task_description_lower:
-        return run_B6(task_description)
-    
-    # ✅ Task B7
-    if "read first" in task_description_lower and "lines of" in task_description_lower:
-        return run_B7(task_description)
-    
-    # ✅ Task B8
-    if "read last" in task_description_lower and "lines of" in task_description_lower:
-        return run_B8(task_description)
-    
-    # ✅ Task B9
-    if "compute sha-256" in task_description_lower and "hash of" in task_description_lower:
-        return run_B9(task_description)
-    
-    # ✅ Task B10
-    if "extract top" in task_description_lower and "words from" in task_description_lower:
-        return run_B10(task_description)
-
-    return {"status": "error", "error": "Bad Request", "details": "Unknown task"}
-
-def run_A1(task_description):
+# Task A1: Install uv and run datagen.py
+@task("A1", triggers=("install uv", "datagen.py"), args=r'[\w\.-]+@[\w\.-]+\.\w+',
+      missing="No email provided in task description")
+def run_A1(email):
     """Installs uv (if not installed) and runs datagen.py with the user's email as the argument."""
     try:
-        # Extract email from the task description
-        email = extract_email(task_description)
-        if not email:
-            return {"status": "error", "error": "Bad Request", "details": "No email provided in task description"}
-
         # Step 1: Check if `uv` is installed
         if not shutil.which("uv"):
             print("Installing uv...")
@@ -121,11 +49,8 @@ def run_A1(task_description):
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
-def extract_email(task_description):
-    """Extracts an email from the task description (basic extraction logic)."""
-    match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', task_description)
-    return match.group(0) if match else None
-
+# Task A2: Format /data/format.md using Prettier
+@task("A2", triggers=("format", "prettier"))
 def run_A2():
     """Formats /data/format.md using Prettier."""
     try:
@@ -151,33 +76,66 @@ def run_A2():
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
-def run_A3():
-    """Counts the number of Wednesdays in /data/dates.txt."""
+from date_parse import WEEKDAYS, count_weekdays, weekday_number
+weekday_args = r"\b(" + "|".join(WEEKDAYS) + r")"
+# Task A3: Count Wednesdays (or any other weekday) in /data/dates.txt
+@task("A3", triggers=("wednesday", "/data/dates.txt"), args=weekday_args)
+def run_A3(weekday="wednesday"):
+    """Counts the number of Wednesdays (or the requested weekday) in /data/dates.txt."""
+    return count_dates_on(weekday.lower())  # One cache entry per weekday, however it was spelled
+
+
+@memoize(inputs=["data/dates.txt"], outputs=lambda weekday: [f"data/dates-{weekday}s.txt"])
+def count_dates_on(weekday):
+    """Writes the number of dates in /data/dates.txt that fall on weekday to /data/dates-<weekday>s.txt."""
     input_file = "data/dates.txt"
-    output_file = "data/dates-wednesdays.txt"
+    output_file = f"data/dates-{weekday}s.txt"
 
     is_safe, error_message = is_path_safe(input_file)
     if not is_safe:
         return {"status": "error", "error": "Security Violation", "details": error_message}
 
     try:
-        with open(input_file, "r") as f:
-            lines = f.readlines()
-
-        count_wednesdays = sum(1 for line in lines if line.strip() and datetime.datetime.strptime(line.strip(), "%Y-%m-%d").weekday() == 2)
+        # Streams the file; each line may be in any of the formats datagen writes
+        counts, unparsed = count_weekdays(input_file)
+        count = counts[weekday_number(weekday)]
+        if unparsed:
+            print(f"DEBUG: A3 skipped {unparsed} lines that are not dates")
 
-        with open(output_file, "w") as f:
-            f.write(str(count_wednesdays))
+        with atomic_write(output_file) as f:
+            f.write(str(count))
 
-        return {"status": "success", "result": f"Task A3 completed: Found {count_wednesdays} Wednesdays."}
+        return {"status": "success", "result": f"Task A3 completed: Found {count} {weekday.capitalize()}s.", "unparsed": unparsed}
 
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
+
+# The same task for the other six weekdays
+for day in WEEKDAYS:
+    if day != "wednesday":
+        tasks.add("A3", run_A3, (day, "/data/dates.txt"), args=weekday_args)
+
     
 import json
-def run_A4():
-    """Sorts contacts.json by last_name, then first_name, and writes to contacts-sorted.json."""
+from operator import attrgetter
+import json_backend
+from external_sort import external_sort, iter_json_records, sort_key, write_json_array
+from json_backend import CONTACT_FIELDS, decode_contacts
+IN_MEMORY_SORT_BYTES = 64 * 1024 * 1024  # Bigger contact files always take the external sort
+sort_field = r"(?:\w+_\w+|email)"
+# Task A4: Sort contacts.json by last_name, then first_name
+@task("A4", triggers=("sort", "contacts.json"),
+      args=rf"^(?=(?:.*?\bby ({sort_field}(?:\s*,?\s*(?:then\s+)?{sort_field})*))?)(?=(?:.*?\b(compact)\b)?)")
+def run_A4(fields=None, compact=None):
+    """Sorts contacts.json by last_name, then first_name (or the fields asked for), and writes to contacts-sorted.json."""
+    fields = tuple(re.findall(sort_field, fields)) if fields else ("last_name", "first_name")
+    return sort_contacts(fields, bool(compact))  # One cache entry per field list, however it was phrased
+
+
+@memoize(inputs=["data/contacts.json"], outputs=["data/contacts-sorted.json"])
+def sort_contacts(fields, compact):
+    """Streams contacts.json (a JSON array or JSONL) through an external merge sort into contacts-sorted.json."""
     try:
         input_file = "data/contacts.json"
         output_file = "data/contacts-sorted.json"
@@ -186,43 +144,52 @@ def run_A4():
         if not os.path.exists(input_file):
             return {"status": "error", "error": "File Not Found", "details": f"{input_file} does not exist"}
 
-        # Read the JSON data
-        with open(input_file, "r") as f:
-            contacts = json.load(f)
-
-        # Sort contacts by last_name, then first_name
-        sorted_contacts = sorted(contacts, key=lambda x: (x["last_name"], x["first_name"]))
+        indent = None if compact else 4
+        contacts = None
+        if os.path.getsize(input_file) <= IN_MEMORY_SORT_BYTES and set(fields) <= set(CONTACT_FIELDS):
+            # Plain contacts that fit in memory: decode into slotted objects with the fastest JSON backend
+            with open(input_file, "rb") as f:
+                contacts = decode_contacts(f.read())
+
+        if contacts is not None:
+            contacts.sort(key=attrgetter(*fields))
+            with atomic_write(output_file, "wb") as f:
+                f.write(json_backend.dumps(contacts, indent))
+            count = len(contacts)
+        else:
+            # Sort in memory-bounded runs spilled to disk, merge them and stream the output
+            with external_sort(iter_json_records(input_file), key=sort_key(fields)) as records:
+                with atomic_write(output_file) as f:
+                    count = write_json_array(records, f, indent)
 
-        # Write the sorted data to the output file
-        with open(output_file, "w") as f:
-            json.dump(sorted_contacts, f, indent=4)
+        return {"status": "success", "result": f"Task A4 completed: {output_file} created successfully.",
+                "records": count, "sort_keys": list(fields)}
 
-        return {"status": "success", "result": f"Task A4 completed: {output_file} created successfully."}
+    except KeyError as e:
+        return {"status": "error", "error": "Bad Request", "details": f"Contact without sort field {e}"}
 
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
     
-import glob
-
+from file_scan import first_line, newest, read_heads, scan_files
+# Task A5: Extract recent log entries
+# Not memoized: fingerprinting every log costs more than the one scandir pass it would skip
+@task("A5", triggers=("recent logs", "logs-recent.txt"))
 def run_A5():
     """Extracts the first line of the 10 most recent .log files and writes to logs-recent.txt."""
     try:
         log_dir = "data/logs"
         output_file = "data/logs-recent.txt"
 
-        # Get all .log files sorted by modified time (most recent first)
-        log_files = sorted(glob.glob(os.path.join(log_dir, "*.log")), key=os.path.getmtime, reverse=True)
+        # One scandir pass stats every .log file once; keep the 10 most recent (newest first)
+        log_files = newest(scan_files(log_dir, ".log"), 10)
 
-        # Extract first lines from the 10 most recent logs
-        extracted_lines = []
-        for log_file in log_files[:10]:  # Take only the latest 10 logs
-            with open(log_file, "r") as f:
-                first_line = f.readline().strip()  # Read first line
-                if first_line:
-                    extracted_lines.append(first_line)
+        # Extract first lines from the 10 most recent logs, reading them concurrently
+        first_lines = read_heads([entry.path for entry in log_files], first_line)
+        extracted_lines = [line for line in first_lines if line]
 
         # Write extracted lines to logs-recent.txt
-        with open(output_file, "w") as f:
+        with atomic_write(output_file) as f:
             f.write("\n".join(extracted_lines))
 
         return {"status": "success", "result": f"Task A5 completed: Extracted recent log entries to {output_file}."}
@@ -230,10 +197,15 @@ def run_A5():
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
+from markdown_index import build_index
+# Task A6: Create an index of Markdown files
+@task("A6", triggers=("create index", "markdown"))
+@memoize(inputs=["data/docs"], outputs=["data/docs/index.json", "data/docs/.index-state.json"])
 def run_A6():
-    """Creates an index.json mapping Markdown files to their first H1 title."""
+    """Creates an index.json mapping Markdown files (relative to /data/docs) to their first H1 title."""
     docs_dir = "data/docs"
     output_file = "data/docs/index.json"
+    state_file = "data/docs/.index-state.json"  # (mtime, size) -> title of every file seen last run
 
     is_safe, error_message = is_path_safe(output_file)
     if not is_safe:
@@ -243,25 +215,19 @@ def run_A6():
         if not os.path.exists(docs_dir):
             return {"status": "error", "error": "Directory Not Found", "details": f"{docs_dir} does not exist"}
 
-        index = {}
-        for md_file in glob.glob(os.path.join(docs_dir, "*.md")):
-            with open(md_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.strip().startswith("# "):  
-                        filename = os.path.basename(md_file)
-                        index[filename] = line[2:].strip()
-                        break  
-
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(index, f, indent=4)
+        # Walks nested directories and only re-reads files that changed since the last run
+        stats = build_index(docs_dir, output_file, state_file)
+        print(f"DEBUG: A6 indexed {stats['files']} files, read {stats['read']}, removed {stats['removed']}")
 
-        return {"status": "success", "result": f"Task A6 completed: Markdown index created at {output_file}."}
+        return {"status": "success", "result": f"Task A6 completed: Markdown index created at {output_file}.", **stats}
 
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
     
 import re
+# Task A7: Extract sender's email address from /data/email.txt using LLM
+@task("A7", triggers=("extract", "email sender"))
 def run_A7():
     """Extracts the sender's email address from /data/email.txt using regex (simulating LLM)."""
     try:
@@ -284,7 +250,7 @@ def run_A7():
         sender_email = match.group(1)
 
         # Write extracted email to output file
-        with open(output_file, "w", encoding="utf-8") as f:
+        with atomic_write(output_file) as f:
             f.write(sender_email)
 
         return {"status": "success", "result": f"Task A7 completed: Extracted sender email to {output_file}."}
@@ -297,6 +263,8 @@ pytesseract.pytesseract.tesseract_cmd = r"C:\Users\yashv\AppData\Local\Programs\
 from PIL import Image
 import re
 
+# Task A8: Extract credit card number from /data/credit-card.png
+@task("A8", triggers=("extract", "credit card"))
 def run_A8():
     """Extracts the credit card number from /data/credit-card.png using OCR."""
     try:
@@ -318,7 +286,7 @@ def run_A8():
             return {"status": "error", "error": "Card Number Not Found", "details": "No valid card number detected in the image"}
 
         # Write extracted card number to output file
-        with open(output_file, "w", encoding="utf-8") as f:
+        with atomic_write(output_file) as f:
             f.write(card_number)
 
         return {"status": "success", "result": f"Task A8 completed: Extracted credit card number to {output_file}."}
@@ -326,13 +294,19 @@ def run_A8():
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
     
-from sentence_transformers import SentenceTransformer, util
-
-def run_A9():
-    """Finds the most similar pair of comments in /data/comments.txt using embeddings."""
+from ann_index import approximate_similar_pairs
+from embedding_cache import get_cache
+from similarity import top_similar_pairs
+
+# Task A9: Find most similar comments in /data/comments.txt
+@task("A9", triggers=("find", "similar comments"),
+      args=r"^(?=(?:.*?top (\d+) pairs)?)(?=(?:.*?\b(approximate|approximately|ann)\b)?)")
+def run_A9(num_pairs=None, approximate=None):
+    """Finds the most similar pairs of comments in /data/comments.txt using embeddings."""
     try:
         input_file = "data/comments.txt"
         output_file = "data/comments-similar.txt"
+        num_pairs = int(num_pairs) if num_pairs else 1
 
         # Check if the file exists
         if not os.path.exists(input_file):
@@ -345,33 +319,42 @@ def run_A9():
         if len(comments) < 2:
             return {"status": "error", "error": "Not Enough Comments", "details": "At least two comments are required"}
 
-        # Load a pre-trained sentence transformer model
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-
-        # Compute embeddings
-        embeddings = model.encode(comments, convert_to_tensor=True)
-
-        # Find the most similar pair
-        max_similarity = -1
-        most_similar_pair = ("", "")
+        # Only comments that are new since the last run get encoded, the rest come from data/embeddings/
+        cache = get_cache()
+        vectors, rows, num_encoded = cache.lookup_rows(comments)
+        print(f"DEBUG: Encoded {num_encoded} of {len(comments)} comments")
 
-        for i in range(len(comments)):
-            for j in range(i + 1, len(comments)):
-                similarity = util.pytorch_cos_sim(embeddings[i], embeddings[j]).item()
-                if similarity > max_similarity:
-                    max_similarity = similarity
-                    most_similar_pair = (comments[i], comments[j])
+        recall = None
+        if approximate:
+            # Opt-in LSH search, sub-quadratic but may miss some of the true top pairs
+            pairs, recall = approximate_similar_pairs(cache, vectors, rows, k=num_pairs)
+            print(f"DEBUG: Approximate search recall on sample -> {recall:.2f}")
+        else:
+            # Blocked matrix multiplies instead of one tensor call per pair
+            pairs = top_similar_pairs(cache.embeddings(vectors, rows), k=num_pairs)
 
-        # Write the most similar comments to output file
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(most_similar_pair[0] + "\n" + most_similar_pair[1])
+        # Write the most similar comments to output file, one blank line between pairs
+        with atomic_write(output_file) as f:
+            f.write("\n\n".join(comments[i] + "\n" + comments[j] for _, i, j in pairs))
 
-        return {"status": "success", "result": f"Task A9 completed: Most similar comments written to {output_file}."}
+        return {
+            "status": "success",
+            "result": f"Task A9 completed: Most similar comments written to {output_file}.",
+            "pairs": [{"score": score, "first": comments[i], "second": comments[j]} for score, i, j in pairs],
+            "mode": "approximate" if approximate else "exact",
+            "recall": recall,
+        }
 
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
     
-import sqlite3
+from db_pool import engine_for, get_pool
+from query_cache import queries
+from ticket_aggregates import total_sales_sql
+# Task A10: Calculate total sales for Gold tickets
+@task("A10", triggers=("total sales", "gold ticket"))
+# The -wal file holds commits not yet checkpointed into the db file
+@memoize(inputs=["data/ticket-sales.db", "data/ticket-sales.db-wal"], outputs=["data/ticket-sales-gold.txt"])
 def run_A10():
     """Calculates total sales for 'Gold' tickets from /data/ticket-sales.db."""
     db_file = "data/ticket-sales.db"
@@ -385,16 +368,16 @@ def run_A10():
         if not os.path.exists(db_file):
             return {"status": "error", "error": "File Not Found", "details": f"{db_file} does not exist"}
 
-        conn = sqlite3.connect(db_file)
-        cursor = conn.cursor()
-        cursor.execute("SELECT SUM(units * price) FROM tickets WHERE type = 'Gold'")
-        total_sales = cursor.fetchone()[0]
-        conn.close()
+        # A primary-key lookup if ticket_aggregates.py has materialized the totals, else a full scan
+        pool = get_pool(db_file)
+        with pool.connection() as conn:
+            _, rows, _ = queries.query(conn, db_file, pool.engine, total_sales_sql(conn, "Gold"))
+            total_sales = rows[0][0]
 
         if total_sales is None:
             total_sales = 0  
 
-        with open(output_file, "w", encoding="utf-8") as f:
+        with atomic_write(output_file) as f:
             f.write(str(total_sales))
 
         return {"status": "success", "result": f"Task A10 completed: Total sales for Gold tickets written to {output_file}."}
@@ -425,51 +408,72 @@ def is_path_safe(file_path):
     return True, None
 
 
+import time
 import requests
+from http_client import download, download_many, output_name
+
+# A URL runs to the next whitespace, minus a trailing "." "," or ";"; commas inside it (?ids=1,2) are kept
+api_url = r"https?://\S+?(?=[.,;]?(?:\s|$)|[,;]https?://)"
+
+# ✅ Task B3: Fetch data from one or more APIs; one URL is saved to /data/api-data.json
+@task("B3", triggers=("fetch", "api"), args=rf"({api_url}(?:[.,;]?\s*(?:and\s+)?{api_url})*)(?:.*?\b(compact|pretty|raw)\b)?",
+      missing="No API URL provided in task description")
+def run_B3(api_urls, layout=None):
+    """Saves API responses as pretty-printed JSON (compact, or the raw body unchecked, on request).
 
-def run_B3(task_description):
-    """Fetches data from an API and saves it to /data/api-data.json."""
+    A single URL goes to /data/api-data.json. Several URLs are fetched
+    concurrently, each into its own file under /data/api-data/.
+    """
     try:
-        output_file = "data/api-data.json"
+        fmt = (layout or "pretty").lower()
+        urls = list(dict.fromkeys(re.findall(api_url, api_urls)))
+
+        if len(urls) > 1:
+            start = time.perf_counter()
+            fetched = download_many([(url, output_name(url)) for url in urls], fmt)
+            seconds = time.perf_counter() - start
+            for entry in fetched:
+                entry["seconds"] = round(entry["seconds"], 4)
+            failed = [entry for entry in fetched if "error" in entry]
+            if len(failed) == len(fetched):
+                return {"status": "error", "error": "API Request Failed", "details": fetched}
+            return {"status": "success",
+                    "result": f"Task B3 completed: {len(fetched) - len(failed)} of {len(fetched)} API responses saved under data/api-data.",
+                    "seconds": round(seconds, 4), "files": fetched}
 
-        # Extract the API URL from the task description
-        match = re.search(r"(https?://\S+)", task_description)
-        if not match:
-            return {"status": "error", "error": "Bad Request", "details": "No API URL provided in task description"}
+        output_file = "data/api-data.json"
 
-        api_url = match.group(0)
+        # Pooled session with retries; an unchanged resource answers 304 and keeps the file
+        fetched = download(urls[0], output_file, fmt=fmt)
 
-        # Fetch data from the API
-        response = requests.get(api_url)
-        if response.status_code != 200:
-            return {"status": "error", "error": "API Request Failed", "details": f"Status Code: {response.status_code}"}
+        state = "unchanged (304)" if fetched["not_modified"] else f"{fetched['bytes']} bytes"
+        return {"status": "success", "result": f"Task B3 completed: API data saved to {output_file}, {state}.",
+                "not_modified": fetched["not_modified"], "seconds": round(fetched["seconds"], 4)}
 
-        api_data = response.json()  # Convert response to JSON
+    except requests.HTTPError as e:
+        return {"status": "error", "error": "API Request Failed", "details": str(e)}
 
-        # Write data to /data/api-data.json
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(api_data, f, indent=4)
+    except requests.RequestException as e:
+        return {"status": "error", "error": "API Unreachable", "details": str(e)}
 
-        return {"status": "success", "result": f"Task B3 completed: API data saved to {output_file}."}
+    except ValueError as e:
+        return {"status": "error", "error": "Invalid API Response", "details": str(e)}
 
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
     
 
 import subprocess
-def run_B4(task_description):
+# ✅ Task B4: Clone a Git repository and commit a change
+@task("B4", triggers=("clone", "git"), args=r"https?://\S+\.git",
+      missing="No Git repository URL provided in task description")
+def run_B4(repo_url):
     """Clones a Git repository, makes a change, and commits it."""
     try:
         repos_dir = "data/repos"
         if not os.path.exists(repos_dir):
             os.makedirs(repos_dir)  # Ensure `/data/repos/` exists
 
-        # Extract the Git repository URL from the task description
-        match = re.search(r"(https?://\S+\.git)", task_description)
-        if not match:
-            return {"status": "error", "error": "Bad Request", "details": "No Git repository URL provided in task description"}
-
-        repo_url = match.group(0)
         repo_name = repo_url.split("/")[-1].replace(".git", "")  # Extract repo name
         repo_path = os.path.join(repos_dir, repo_name)
 
@@ -495,55 +499,70 @@ def run_B4(task_description):
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
-import sqlite3
-import duckdb
-def run_B5(task_description):
-    """Runs a SQL query on SQLite or DuckDB and writes the result to /data/sql-results.txt."""
+import sql_export
+
+# ✅ Task B5
+@task("B5", triggers=("run sql", "on", "query"),
+      args=r"run sql query '(.*?)' on (\S+)(?: as (text|csv|jsonl|parquet|arrow)\b)?(?: limit (\d+)(?: rows)?)?(?: timeout (\d+) ?s(?:econds)?)?",
+      missing="No valid SQL query or database provided")
+def run_B5(sql_query, db_file, fmt=None, max_rows=None, timeout=None):
+    """Runs a SQL query on SQLite or DuckDB and streams the result to /data/sql-results.<format>."""
     try:
-        print(f"DEBUG: Task received -> {task_description}")  # ✅ Debugging output
-        output_file = "data/sql-results.txt"
+        fmt = (fmt or "text").lower()
+        output_file = sql_export.output_path("data/sql-results", fmt)
 
         # Security Check: Ensure output file is inside /data/
         is_safe, error_message = is_path_safe(output_file)
         if not is_safe:
             return {"status": "error", "error": "Security Violation", "details": error_message}
 
-        # Extract SQL query from task description
-        match = re.search(r"run sql query '(.*?)' on (\S+)", task_description, re.IGNORECASE)
-        if not match:
-            return {"status": "error", "error": "Bad Request", "details": "No valid SQL query or database provided"}
-
-        db_file, sql_query = match.groups()
-
         db_path = f"data/{db_file}"  # Ensure DB is inside /data/
         is_safe, error_message = is_path_safe(db_path)
         if not is_safe:
             return {"status": "error", "error": "Security Violation", "details": error_message}
 
         # Choose the right database engine
-        if db_file.endswith(".db"):
-            conn = sqlite3.connect(db_path)
-        elif db_file.endswith(".duckdb"):
-            conn = duckdb.connect(db_path)
-        else:
+        if not db_file.endswith((".db", ".duckdb")):
             return {"status": "error", "error": "Unsupported Database", "details": "Only SQLite (.db) and DuckDB (.duckdb) are supported"}
 
-        cursor = conn.cursor()
-        cursor.execute(sql_query)
-        results = cursor.fetchall()
-        conn.close()
+        if not os.path.exists(db_path):
+            return {"status": "error", "error": "File Not Found", "details": f"{db_path} does not exist"}
+
+        error_message = sql_export.format_error(fmt, engine_for(db_path))
+        if error_message:
+            return {"status": "error", "error": "Unsupported Format", "details": error_message}
+
+        # A requested limit can lower the configured cap (SQL_MAX_ROWS) but never raise it
+        max_rows = min(int(max_rows), sql_export.MAX_ROWS) if max_rows else sql_export.MAX_ROWS
+        timeout = float(timeout) if timeout else sql_export.TIMEOUT
+
+        # Pooled read-only connection; rows are written in fetchmany batches, never all held in memory
+        # Repeated queries against an unchanged database are answered from the query cache
+        pool = get_pool(db_path)
+        with pool.connection() as conn:
+            cache_key = queries.key(conn, db_path, pool.engine, sql_query, max_rows)
+            count, truncated, cached = sql_export.export_query(conn, sql_query, output_file, fmt, pool.engine,
+                                                               max_rows=max_rows, timeout=timeout,
+                                                               cache=queries, cache_key=cache_key)
+
+        print(f"DEBUG: B5 wrote {count} rows as {fmt} to {output_file} (cached: {cached})")  # ✅ Debugging output
+        limit_note = " (row limit reached)" if truncated else ""
+        return {"status": "success", "result": f"Task B5 completed: SQL query executed, {count} rows saved to {output_file}{limit_note}.",
+                "rows": count, "truncated": truncated, "format": fmt, "query_cached": cached}
 
-        # Save results to file
-        with open(output_file, "w", encoding="utf-8") as f:
-            for row in results:
-                f.write(str(row) + "\n")
+    except sql_export.QueryTimeout as e:
+        return {"status": "error", "error": "Query Timeout", "details": str(e)}
 
-        return {"status": "success", "result": f"Task B5 completed: SQL query executed, results saved to {output_file}."}
+    except ImportError as e:
+        return {"status": "error", "error": "Missing Dependency", "details": f"{e}. Install pyarrow for Parquet/Arrow output"}
 
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
     
-def run_B6(task_description):
+# ✅ Task B6
+@task("B6", triggers=("list files", "directory"), args=r"list files in directory (.+)",
+      missing="No valid directory provided")
+def run_B6(directory):
     """Lists all files in a directory and writes them to /data/files-list.txt."""
     try:
         output_file = "data/files-list.txt"
@@ -553,12 +572,7 @@ def run_B6(task_description):
         if not is_safe:
             return {"status": "error", "error": "Security Violation", "details": error_message}
 
-        # ✅ Extract directory path from task description
-        match = re.search(r"list files in directory (.+)", task_description, re.IGNORECASE)
-        if not match:
-            return {"status": "error", "error": "Bad Request", "details": "No valid directory provided"}
-
-        dir_path = f"data/{match.group(1)}"  # ✅ Ensure directory is inside /data/
+        dir_path = f"data/{directory}"  # ✅ Ensure directory is inside /data/
         is_safe, error_message = is_path_safe(dir_path)
         if not is_safe:
             return {"status": "error", "error": "Security Violation", "details": error_message}
@@ -571,7 +585,7 @@ def run_B6(task_description):
         file_list = os.listdir(dir_path)
 
         # ✅ Write file names to files-list.txt
-        with open(output_file, "w", encoding="utf-8") as f:
+        with atomic_write(output_file) as f:
             for file_name in file_list:
                 f.write(file_name + "\n")
 
@@ -580,20 +594,14 @@ def run_B6(task_description):
     except Exception as e:
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
-def run_B7(task_description):
+# ✅ Task B7
+@task("B7", triggers=("read first", "lines of"), args=r"read first (\d+) lines of (.+)",
+      missing="No valid file or number of lines provided")
+def run_B7(num_lines, file_path):
     """Reads the first N lines of a file and writes them to /data/head.txt."""
     try:
         output_file = "data/head.txt"
 
-        print(f"DEBUG: Task received -> {task_description}")  # ✅ Debugging
-
-        # ✅ Extract file path and number of lines
-        match = re.search(r"read first (\d+) lines of (.+)", task_description, re.IGNORECASE)
-        if not match:
-            print("DEBUG: Regex failed to extract file path and number of lines")
-            return {"status": "error", "error": "Bad Request", "details": "No valid file or number of lines provided"}
-
-        num_lines, file_path = match.groups()
         num_lines = int(num_lines)
         file_path = f"data/{file_path}"  # ✅ Ensure file is inside /data/
 
@@ -616,7 +624,7 @@ def run_B7(task_description):
         print(f"DEBUG: Extracted lines -> {lines}")  # ✅ Debugging
 
         # ✅ Write output to head.txt
-        with open(output_file, "w", encoding="utf-8") as f:
+        with atomic_write(output_file) as f:
             f.write("\n".join(lines))
 
         return {"status": "success", "result": f"Task B7 completed: First {num_lines} lines written to {output_file}."}
@@ -626,23 +634,17 @@ def run_B7(task_description):
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
 
-from collections import deque
+from tail import tail_lines
 import re
 import os
-def run_B8(task_description):
+# ✅ Task B8
+@task("B8", triggers=("read last", "lines of"), args=r"read last (\d+) lines of (.+)",
+      missing="No valid file or number of lines provided")
+def run_B8(num_lines, file_path):
     """Reads the last N lines of a file and writes them to /data/tail.txt."""
     try:
         output_file = "data/tail.txt"
 
-        print(f"DEBUG: Task received -> {task_description}")  # ✅ Debugging
-
-        # ✅ Extract file path and number of lines
-        match = re.search(r"read last (\d+) lines of (.+)", task_description, re.IGNORECASE)
-        if not match:
-            print("DEBUG: Regex failed to extract file path and number of lines")
-            return {"status": "error", "error": "Bad Request", "details": "No valid file or number of lines provided"}
-
-        num_lines, file_path = match.groups()
         num_lines = int(num_lines)
         file_path = f"data/{file_path}"  # ✅ Ensure file is inside /data/
 
@@ -653,21 +655,17 @@ def run_B8(task_description):
             print("DEBUG: File not found")
             return {"status": "error", "error": "File Not Found", "details": f"{file_path} does not exist"}
 
-        # ✅ Read the last N lines using deque for efficiency
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = deque(f, num_lines)
-
-        # ✅ Strip extra spaces and remove blank lines
-        cleaned_lines = [line.strip() for line in lines if line.strip()]
+        # ✅ Read the last N non-blank lines by seeking back from the end, not scanning the whole file
+        cleaned_lines = tail_lines(file_path, num_lines)
 
         # ✅ If no valid lines, return an error message
         if not cleaned_lines:
-            with open(output_file, "w", encoding="utf-8") as f:
+            with atomic_write(output_file) as f:
                 f.write("Error: File does not have enough valid lines")
             return {"status": "error", "error": "Not Enough Lines", "details": "File has too many blank lines"}
 
         # ✅ Write output to tail.txt without extra newlines
-        with open(output_file, "w", encoding="utf-8") as f:
+        with atomic_write(output_file) as f:
             f.write("\n".join(cleaned_lines))
 
         print(f"DEBUG: Final Output Written to {output_file}")  # ✅ Debugging
@@ -678,39 +676,47 @@ def run_B8(task_description):
         print(f"DEBUG: Exception -> {e}")  # ✅ Debugging
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
-import hashlib
-def run_B9(task_description):
-    """Computes the SHA-256 hash of a file and writes it to /data/hash.txt."""
-    try:
-        output_file = "data/hash.txt"
+from file_scan import expand_sources
+from manifest import manifest
 
-        print(f"DEBUG: Task received -> {task_description}")  # ✅ Debugging
+# ✅ Task B9
+@task("B9", triggers=("compute sha-256", "hash of"), args=r"compute sha-256 hash of (.+)",
+      missing="No valid file provided")
+def run_B9(file_path):
+    """Computes the SHA-256 hash of a file and writes it to /data/hash.txt.
 
-        # ✅ Extract file path from the task description
-        match = re.search(r"compute sha-256 hash of (.+)", task_description, re.IGNORECASE)
-        if not match:
-            print("DEBUG: Regex failed to extract file path")
-            return {"status": "error", "error": "Bad Request", "details": "No valid file provided"}
+    For a directory or glob, every file is hashed on a thread pool and hash.txt
+    gets one "<digest>  <path>" line per file, like sha256sum. Digests come from
+    the hash manifest when a file's size, mtime and inode are unchanged.
+    """
+    try:
+        output_file = "data/hash.txt"
 
-        file_path = f"data/{match.group(1)}"  # ✅ Ensure file is inside /data/
+        file_path = f"data/{file_path}"  # ✅ Ensure file is inside /data/
 
         print(f"DEBUG: Extracted -> File: {file_path}")  # ✅ Debugging
 
-        # ✅ Check if file exists
-        if not os.path.exists(file_path):
+        # ✅ Resolve a file, a directory (recursively) or a glob pattern to the files to hash
+        sources = expand_sources(file_path)
+        if not sources:
             print("DEBUG: File not found")
             return {"status": "error", "error": "File Not Found", "details": f"{file_path} does not exist"}
 
-        # ✅ Compute SHA-256 hash
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
+        for source in sources:
+            is_safe, error_message = is_path_safe(source)
+            if not is_safe:
+                return {"status": "error", "error": "Security Violation", "details": error_message}
 
-        file_hash = sha256_hash.hexdigest()
+        # ✅ Compute SHA-256 only for files the manifest hasn't seen in their current state
+        digests = manifest.digests(sources)
+        print(f"DEBUG: {sum(cached for _, cached in digests.values())} of {len(sources)} digests from manifest")
+        if os.path.isfile(file_path):
+            file_hash = digests[file_path][0]
+        else:
+            file_hash = "\n".join(f"{digests[source][0]}  {source}" for source in sources)
 
         # ✅ Write hash to hash.txt
-        with open(output_file, "w", encoding="utf-8") as f:
+        with atomic_write(output_file) as f:
             f.write(file_hash)
 
         print(f"DEBUG: SHA-256 Hash -> {file_hash}")  # ✅ Debugging
@@ -722,52 +728,71 @@ def run_B9(task_description):
         return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
 
-from collections import Counter
-import string
-
-def run_B10(task_description):
-    """Extracts the top N most common words from a file and writes them to /data/words.txt."""
+# ✅ Task B11: Verify all files under /data/ against the hash manifest
+@task("B11", triggers=("verify all files",))
+def run_B11():
+    """Rehashes files under /data/ whose stat signature changed and writes a report to /data/verify-report.json."""
     try:
-        output_file = "data/words.txt"
+        output_file = "data/verify-report.json"
 
-        print(f"DEBUG: Task received -> {task_description}")  # ✅ Debugging
+        report = manifest.verify("data", exclude=[output_file])  # The last report isn't data to verify
+
+        with atomic_write(output_file) as f:
+            json.dump(report, f, indent=4)
+
+        rehashed = len(report["new"]) + len(report["modified"]) + len(report["touched"])
+        return {
+            "status": "success",
+            "result": f"Task B11 completed: {rehashed} files rehashed, {report['unchanged']} unchanged, "
+                      f"{len(report['modified'])} modified, {len(report['missing'])} missing. Report written to {output_file}.",
+        }
+
+    except Exception as e:
+        print(f"DEBUG: Exception -> {e}")  # ✅ Debugging
+        return {"status": "error", "error": "Internal Server Error", "details": str(e)}
 
-        # ✅ Extract file path and number of words
-        match = re.search(r"extract top (\d+) words from (.+)", task_description, re.IGNORECASE)
-        if not match:
-            print("DEBUG: Regex failed to extract file path and number of words")
-            return {"status": "error", "error": "Bad Request", "details": "No valid file or number of words provided"}
 
-        num_words, file_path = match.groups()
+from word_count import top_words
+
+# ✅ Task B10
+@task("B10", triggers=("extract top", "words from"), args=r"extract top (\d+) (approximate )?words from (.+)",
+      missing="No valid file or number of words provided")
+@memoize(inputs=lambda num_words, approximate, file_path: expand_sources(f"data/{file_path}"), outputs=["data/words.txt"])
+def run_B10(num_words, approximate, file_path):
+    """Extracts the top N most common words from a file, directory or glob and writes them to /data/words.txt.
+
+    Large inputs are split into byte ranges and counted across a process pool.
+
+    "extract top N approximate words from ..." uses a Space-Saving summary whose
+    memory doesn't grow with the vocabulary; counts are then upper bounds.
+    """
+    try:
+        output_file = "data/words.txt"
+
         num_words = int(num_words)
         file_path = f"data/{file_path}"  # ✅ Ensure file is inside /data/
 
         print(f"DEBUG: Extracted -> File: {file_path}, Words: {num_words}")  # ✅ Debugging
 
-        # ✅ Check if file exists
-        if not os.path.exists(file_path):
+        # ✅ Resolve a file, a directory (recursively) or a glob pattern to the files to count
+        sources = expand_sources(file_path)
+        if not sources:
             print("DEBUG: File not found")
             return {"status": "error", "error": "File Not Found", "details": f"{file_path} does not exist"}
 
-        # ✅ Read file content
-        with open(file_path, "r", encoding="utf-8") as f:
-            text = f.read().lower()
-
-        # ✅ Remove punctuation
-        text = text.translate(str.maketrans("", "", string.punctuation))
-
-        # ✅ Tokenize words and count frequency
-        words = text.split()
-        word_counts = Counter(words)
+        for source in sources:
+            is_safe, error_message = is_path_safe(source)
+            if not is_safe:
+                return {"status": "error", "error": "Security Violation", "details": error_message}
 
-        # ✅ Get the top N most common words
-        most_common_words = word_counts.most_common(num_words)
+        # ✅ Stream every file in chunks, in parallel shards when the input is large
+        most_common_words = top_words(sources, num_words, approximate=bool(approximate))
 
         # ✅ Format the output (word: count)
         formatted_output = "\n".join([f"{word}: {count}" for word, count in most_common_words])
 
         # ✅ Write output to words.txt
-        with open(output_file, "w", encoding="utf-8") as f:
+        with atomic_write(output_file) as f:
             f.write(formatted_output)
 
         print(f"DEBUG: Extracted words -> {formatted_output}")  # ✅ Debugging
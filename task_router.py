@@ -0,0 +1,170 @@
+import re
+import threading
+from collections import namedtuple
+
+Task = namedtuple("Task", ["name", "handler", "triggers", "args", "missing"])
+
+
+def _build_trie(phrases):
+    """Nested {char: node} dicts; the key None marks the end of a phrase and holds it."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[None] = phrase
+    return trie
+
+
+def _trie_pattern(node):
+    """A regex matching any phrase of a trie, factored by common prefixes: ["ab", "ac", "a"] -> a(?:b|c)?
+
+    At each position the engine follows one branch per character instead of
+    trying every phrase, and greedy optional tails make it match the longest
+    phrase that starts there.
+    """
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items(), key=lambda item: item[0] or "")
+                if ch is not None]
+    if not branches:
+        return ""
+    if len(branches) > 1:
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if None in node else body
+    return f"(?:{branches[0]})?" if None in node else branches[0]
+
+
+class PhraseMatcher:
+    """Finds every trigger phrase in a text with one compiled regex, so the scan runs in C.
+
+    The phrases are compiled into one prefix-factored alternation, and
+    finditer() yields the longest phrase at each place it matches. Every
+    phrase occurring inside a match is known in advance (within). finditer()
+    skips over what it matched, so the only phrases it can miss are longer
+    ones that start inside a match and run past its end; those can only
+    start at a few offsets of each phrase (straddles), where the pattern is
+    tried again. The cost still grows with the number of phrases, as the
+    regex engine tries a trie node's branches one after another.
+    """
+
+    def __init__(self, phrases):
+        trie = _build_trie(phrases)
+        self.pattern = re.compile(_trie_pattern(trie), re.DOTALL)
+        self.within, self.straddles = {}, {}
+        for phrase in set(phrases):
+            within, straddles = set(), []
+            for offset in range(len(phrase)):
+                node = trie
+                for ch in phrase[offset:]:
+                    node = node.get(ch)
+                    if node is None:
+                        break
+                    if None in node:
+                        within.add(node[None])
+                else:
+                    # phrase[offset:] is a proper prefix of some longer phrase
+                    if offset and len(node) > (None in node):
+                        straddles.append(offset)
+            self.within[phrase] = frozenset(within)
+            self.straddles[phrase] = tuple(straddles)
+
+    def find(self, text):
+        """Returns the set of phrases that occur anywhere in text."""
+        found = set()
+        match = self.pattern.match
+        for found_match in self.pattern.finditer(text):
+            phrase = found_match[0]
+            found |= self.within[phrase]
+            for offset in self.straddles[phrase]:
+                inner = match(text, found_match.start() + offset)
+                if inner is not None:
+                    found |= self.within[inner[0]]
+        return found
+
+
+class TaskRegistry:
+    """Maps plain-English task descriptions to their handlers.
+
+    Each handler declares its trigger phrases and argument regex once. All trigger
+    phrases are compiled into one PhraseMatcher, and only tasks owning a phrase it
+    found are checked, instead of testing every task in turn. When several tasks
+    match, the one registered first wins, just like the old if-cascade.
+    """
+
+    def __init__(self):
+        self._tasks = []
+        # (PhraseMatcher, {phrase: [task index]}), rebuilt after add()
+        self._compiled_state = None
+        self._lock = threading.Lock()
+
+    def register(self, name, triggers, args=None, missing="Invalid task arguments"):
+        """Decorator form of add()."""
+        def decorator(handler):
+            self.add(name, handler, triggers, args, missing)
+            return handler
+        return decorator
+
+    def add(self, name, handler, triggers, args=None, missing="Invalid task arguments"):
+        """Registers a handler that runs when every phrase in triggers is present.
+
+        If args is given, it is searched (case-insensitively) in the original description
+        and its groups are passed to the handler positionally. A pattern without groups
+        passes the whole match. If args does not match, the task fails with `missing`.
+        """
+        if isinstance(triggers, str):
+            triggers = (triggers,)
+        triggers = frozenset(phrase.lower() for phrase in triggers)
+        if not triggers:
+            raise ValueError(f"Task {name} needs at least one trigger phrase")
+        if isinstance(args, str):
+            args = re.compile(args, re.IGNORECASE)
+
+        with self._lock:
+            self._tasks.append(Task(name, handler, triggers, args, missing))
+            self._compiled_state = None  # Recompiled on next dispatch
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def _compiled(self):
+        state = self._compiled_state  # One read: the matcher and its phrase table always travel together
+        if state is not None:
+            return state
+        with self._lock:
+            if self._compiled_state is None:
+                by_phrase = {}
+                for index, entry in enumerate(self._tasks):
+                    for phrase in entry.triggers:
+                        by_phrase.setdefault(phrase, []).append(index)
+                self._compiled_state = (PhraseMatcher(by_phrase), by_phrase)
+            return self._compiled_state
+
+    def match(self, task_description):
+        """Returns the Task whose triggers all appear in the description, or None."""
+        matcher, by_phrase = self._compiled()
+        found = matcher.find(task_description.lower())
+        if not found:
+            return None
+
+        # Only tasks that own at least one of the found phrases can match
+        candidates = sorted({index for phrase in found for index in by_phrase[phrase]})
+        for index in candidates:
+            entry = self._tasks[index]
+            if entry.triggers <= found:
+                return entry
+        return None
+
+    def dispatch(self, task_description):
+        """Finds the matching task, extracts its arguments and runs it."""
+        entry = self.match(task_description)
+        if entry is None:
+            return {"status": "error", "error": "Bad Request", "details": "Unknown task"}
+
+        if entry.args is None:
+            return entry.handler()
+
+        match = entry.args.search(task_description)
+        if not match:
+            print(f"DEBUG: Regex failed to extract arguments for task {entry.name}")
+            return {"status": "error", "error": "Bad Request", "details": entry.missing}
+
+        return entry.handler(*(match.groups() or (match.group(0),)))
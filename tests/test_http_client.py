@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_client
+from http_client import ValidatorCache, download
+
+BODY = json.dumps({"items": [1, 2, 3], "name": "api"}).encode()
+PRETTY = json.dumps(json.loads(BODY), indent=4).encode()
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves BODY with an ETag; /flaky fails with 503 a set number of times, /missing is a 404, /text isn't JSON."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/missing":
+            return self._send(404)
+        if self.path == "/flaky" and server.failures > 0:
+            server.failures -= 1
+            return self._send(503)
+        if self.headers.get("If-None-Match") == ETAG:
+            return self._send(304)
+        self._send(200, b"not json" if self.path == "/text" else BODY)
+
+    def _send(self, status, body=b""):
+        self.send_response(status)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests, server.failures = [], 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """A fresh shared session with short backoff, so retry tests stay fast."""
+    monkeypatch.setattr(http_client, "BACKOFF", 0.1)
+    monkeypatch.setattr(http_client, "_session", None)
+    session = http_client.get_session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ValidatorCache(str(tmp_path / "http-cache.json"))
+
+
+def test_not_modified_keeps_the_file(server, session, cache, tmp_path):
+    output = str(tmp_path / "api-data.json")
+    first = download(server.url + "/data", output, cache=cache)
+    assert first["status"] == 200 and not first["not_modified"]
+    assert first["bytes"] == len(BODY)
+    signature = os.stat(output).st_mtime_ns
+
+    second = download(server.url + "/data", output, cache=cache)
+    assert second["status"] == 304 and second["not_modified"] and second["bytes"] == 0
+    assert server.requests == [("/data", None), ("/data", ETAG)]
+    with open(output, "rb") as f:
+        assert f.read() == PRETTY
+    assert os.stat(output).st_mtime_ns == signature
+
+
+def test_etag_not_reused_after_the_file_changes(server, session, cache, tmp_path):
+    output = str(tmp_path / "api-data.json")
+    download(server.url + "/data", output, cache=cache)
+    with open(output, "w") as f:
+        f.write("edited")
+
+    result = download(server.url + "/data", output, cache=cache)
+    assert result["status"] == 200
+    assert server.requests[-1] == ("/data", None)
+    with open(output, "rb") as f:
+        assert f.read() == PRETTY
+
+
+def test_etag_not_reused_for_another_format(server, session, cache, tmp_path):
+    output = str(tmp_path / "api-data.json")
+    download(server.url + "/data", output, fmt="raw", cache=cache)
+    with open(output, "rb") as f:
+        assert f.read() == BODY
+
+    result = download(server.url + "/data", output, cache=cache)
+    assert result["status"] == 200
+    assert server.requests[-1] == ("/data", None)
+    with open(output, "rb") as f:
+        assert f.read() == PRETTY
+
+    assert download(server.url + "/data", output, cache=cache)["not_modified"]
+
+
+def test_body_that_is_not_json_is_rejected(server, session, cache, tmp_path):
+    output = str(tmp_path / "api-data.json")
+    with pytest.raises(ValueError):
+        download(server.url + "/text", output, cache=cache)
+    assert not os.path.exists(output)
+
+    download(server.url + "/text", output, fmt="raw", cache=cache)
+    with open(output, "rb") as f:
+        assert f.read() == b"not json"
+
+
+def test_retries_503_with_backoff(server, session, cache, tmp_path):
+    server.failures = 2
+    output = str(tmp_path / "api-data.json")
+    start = time.perf_counter()
+    result = download(server.url + "/flaky", output, cache=cache)
+    assert result["status"] == 200
+    assert len(server.requests) == 3
+    assert time.perf_counter() - start >= 0.2  # urllib3 backs off 0s, then BACKOFF * 2
+
+
+def test_persistent_503_raises_after_retries(server, session, cache, tmp_path):
+    server.failures = 100
+    with pytest.raises(requests.HTTPError, match="503"):
+        download(server.url + "/flaky", str(tmp_path / "api-data.json"), cache=cache)
+    assert len(server.requests) == http_client.RETRIES + 1
+
+
+def test_non_200_raises_and_leaves_no_file(server, session, cache, tmp_path):
+    output = str(tmp_path / "api-data.json")
+    with pytest.raises(requests.HTTPError, match="404"):
+        download(server.url + "/missing", output, cache=cache)
+    assert not os.path.exists(output)
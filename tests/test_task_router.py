@@ -0,0 +1,36 @@
+import random
+
+from task_router import PhraseMatcher, TaskRegistry
+
+
+def linear_find(phrases, text):
+    return {phrase for phrase in phrases if phrase in text}
+
+
+def test_phrase_matcher_agrees_with_linear_search():
+    rng = random.Random(0)
+    for _ in range(5000):
+        # A tiny alphabet makes overlapping and nested phrases common
+        phrases = {"".join(rng.choice("ab ") for _ in range(rng.randint(1, 6))) for _ in range(rng.randint(1, 12))}
+        text = "".join(rng.choice("ab c") for _ in range(rng.randint(0, 40)))
+        assert PhraseMatcher(phrases).find(text) == linear_find(phrases, text), (phrases, text)
+
+
+def test_phrase_matcher_overlapping_phrases():
+    phrases = ["read last", "last 10 lines", "lines of", "line", "st 1"]
+    text = "please read last 10 lines of logs/server.log"
+    assert PhraseMatcher(phrases).find(text) == linear_find(phrases, text)
+    assert PhraseMatcher(["a.b", "(x"]).find("a.b (x axb") == {"a.b", "(x"}
+
+
+def test_registry_first_registered_wins():
+    registry = TaskRegistry()
+    registry.add("first", lambda: "first", ("count", "wednesdays"))
+    registry.add("second", lambda: "second", ("count",))
+    registry.add("third", lambda n: n, ("lines of",), args=r"last (\d+) lines")
+
+    assert registry.match("Count the Wednesdays").name == "first"
+    assert registry.match("count the sundays").name == "second"
+    assert registry.match("nothing here") is None
+    assert registry.dispatch("read last 10 lines of a file") == "10"
+    assert registry.dispatch("lines of a file")["details"] == "Invalid task arguments"
@@ -0,0 +1,65 @@
+import random
+import sqlite3
+
+import pytest
+
+from ticket_aggregates import drop, is_materialized, materialize, total_sales_sql
+
+
+def gold_totals(conn):
+    """Gold total from the aggregate table and from the full scan."""
+    materialized = conn.execute(total_sales_sql(conn, "Gold")).fetchone()[0]
+    drop(conn)
+    scanned = conn.execute(total_sales_sql(conn, "Gold")).fetchone()[0]
+    materialize(conn)
+    return materialized, scanned
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE tickets (type TEXT NOT NULL, units INTEGER NOT NULL, price DECIMAL(10,2) NOT NULL)")
+    materialize(conn)
+    assert is_materialized(conn)
+    yield conn
+    conn.close()
+
+
+def test_delete_leaves_exact_total(conn):
+    conn.executemany("INSERT INTO tickets VALUES ('Gold', 1, ?)", [(0.1,), (0.2,)])
+    conn.execute("DELETE FROM tickets WHERE price = 0.1")
+    assert gold_totals(conn) == (0.2, 0.2)
+
+
+def test_totals_match_scan_after_inserts_updates_and_deletes(conn):
+    rng = random.Random(0)
+    conn.executemany("INSERT INTO tickets VALUES (?, ?, ?)", [
+        (rng.choice(("Gold", "Silver", "Bronze")), rng.randint(1, 10), round(rng.uniform(50, 150), 2))
+        for _ in range(5000)
+    ])
+    conn.execute("UPDATE tickets SET type = 'Gold', price = price + 0.01 WHERE rowid % 7 = 0")
+    conn.execute("UPDATE tickets SET units = units + 1 WHERE rowid % 5 = 0")
+    conn.execute("DELETE FROM tickets WHERE rowid % 3 = 0")
+    materialized, scanned = gold_totals(conn)
+    assert materialized == scanned
+
+    conn.execute("DELETE FROM tickets")
+    assert gold_totals(conn) == (0.0, 0.0)
+
+
+def test_rebuilds_tables_from_before_cents(conn):
+    drop(conn)
+    conn.executescript("""
+        CREATE TABLE ticket_sales_by_type (type TEXT PRIMARY KEY, total_sales REAL NOT NULL,
+                                           total_units INTEGER NOT NULL, ticket_count INTEGER NOT NULL);
+        CREATE TRIGGER tickets_sales_insert AFTER INSERT ON tickets BEGIN SELECT 1; END;
+        CREATE TRIGGER tickets_sales_delete AFTER DELETE ON tickets BEGIN SELECT 1; END;
+        CREATE TRIGGER tickets_sales_update AFTER UPDATE ON tickets BEGIN SELECT 1; END;
+    """)
+    conn.execute("INSERT INTO tickets VALUES ('Gold', 2, 10.25)")
+    assert not is_materialized(conn)
+    assert conn.execute(total_sales_sql(conn, "Gold")).fetchone()[0] == 20.5
+
+    materialize(conn)
+    assert is_materialized(conn)
+    assert gold_totals(conn) == (20.5, 20.5)
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from watcher import Inotify, Watch, Watcher
+
+try:
+    Inotify().close()
+except OSError:
+    pytest.skip("inotify is not available", allow_module_level=True)
+
+
+def wait_for(condition, timeout=10):
+    """Polls condition until it holds or timeout seconds pass; returns its last value."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_unrelated_writes_do_not_hold_back_a_recompute(tmp_path):
+    dates = tmp_path / "dates.txt"
+    dates.write_text("2024-01-03\n")
+    runs = []
+    # A max_wait far beyond the polling deadline: if noise postponed the recompute, it would never be seen
+    watcher = Watcher([Watch("A3", lambda: runs.append(time.monotonic()) or {"status": "success"}, [str(dates)])],
+                      debounce=0.2, max_wait=60).start()
+    try:
+        assert wait_for(lambda: runs)  # The initial run that starts it hot
+
+        # Noise next to the input every 0.1s must neither count as a change nor postpone one
+        stop = threading.Event()
+        writes = []
+
+        def noise():
+            while not stop.wait(0.1):
+                (tmp_path / "other.txt").write_text(str(time.time()))
+                writes.append(time.monotonic())
+
+        thread = threading.Thread(target=noise)
+        thread.start()
+        try:
+            assert wait_for(lambda: len(writes) >= 5)  # Well past the debounce after the first write
+            assert len(runs) == 1
+
+            dates.write_text("2024-01-10\n")
+            assert wait_for(lambda: len(runs) >= 2)
+
+            seen = len(writes)
+            assert wait_for(lambda: len(writes) >= seen + 5)
+            assert len(runs) == 2
+        finally:
+            stop.set()
+            thread.join()
+    finally:
+        watcher.stop()
@@ -0,0 +1,130 @@
+# Optional materialization for the tickets table of ticket-sales.db.
+
+# Usage: python ticket_aggregates.py data/ticket-sales.db [--drop]
+
+import sqlite3
+
+AGGREGATE_TABLE = "ticket_sales_by_type"
+
+# Sales are summed as whole cents, so the running totals stay exact however many
+# rows are added and removed (float += / -= drifts away from a fresh SUM)
+CENTS = "CAST(ROUND({row}units * {row}price * 100) AS INTEGER)"
+
+MATERIALIZE = f"""
+CREATE INDEX IF NOT EXISTS tickets_type_sales ON tickets (type, units, price);
+
+CREATE TABLE IF NOT EXISTS {AGGREGATE_TABLE} (
+    type TEXT PRIMARY KEY,
+    total_cents INTEGER NOT NULL,
+    total_units INTEGER NOT NULL,
+    ticket_count INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS tickets_sales_insert AFTER INSERT ON tickets BEGIN
+    INSERT INTO {AGGREGATE_TABLE} (type, total_cents, total_units, ticket_count)
+    VALUES (NEW.type, {CENTS.format(row="NEW.")}, NEW.units, 1)
+    ON CONFLICT (type) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents,
+        total_units = total_units + excluded.total_units,
+        ticket_count = ticket_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tickets_sales_delete AFTER DELETE ON tickets BEGIN
+    UPDATE {AGGREGATE_TABLE} SET
+        total_cents = total_cents - {CENTS.format(row="OLD.")},
+        total_units = total_units - OLD.units,
+        ticket_count = ticket_count - 1
+    WHERE type = OLD.type;
+    DELETE FROM {AGGREGATE_TABLE} WHERE type = OLD.type AND ticket_count = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tickets_sales_update AFTER UPDATE OF type, units, price ON tickets BEGIN
+    UPDATE {AGGREGATE_TABLE} SET
+        total_cents = total_cents - {CENTS.format(row="OLD.")},
+        total_units = total_units - OLD.units,
+        ticket_count = ticket_count - 1
+    WHERE type = OLD.type;
+    DELETE FROM {AGGREGATE_TABLE} WHERE type = OLD.type AND ticket_count = 0;
+    INSERT INTO {AGGREGATE_TABLE} (type, total_cents, total_units, ticket_count)
+    VALUES (NEW.type, {CENTS.format(row="NEW.")}, NEW.units, 1)
+    ON CONFLICT (type) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents,
+        total_units = total_units + excluded.total_units,
+        ticket_count = ticket_count + 1;
+END;
+"""
+
+DROP_AGGREGATES = f"""
+DROP TRIGGER IF EXISTS tickets_sales_insert;
+DROP TRIGGER IF EXISTS tickets_sales_delete;
+DROP TRIGGER IF EXISTS tickets_sales_update;
+DROP TABLE IF EXISTS {AGGREGATE_TABLE};
+"""
+
+DROP = DROP_AGGREGATES + """
+DROP INDEX IF EXISTS tickets_type_sales;
+"""
+
+
+def materialize(conn):
+    """Adds the covering index, the per-type aggregate table and its triggers, and backfills it.
+
+    Safe to run again: the aggregate table and triggers are recreated (which
+    also upgrades ones from an older layout) and refilled from the table in
+    the same transaction, so they always match the scan in total_sales_sql().
+    """
+    conn.executescript("BEGIN;" + DROP_AGGREGATES + MATERIALIZE + f"""
+        INSERT INTO {AGGREGATE_TABLE} (type, total_cents, total_units, ticket_count)
+        SELECT type, SUM({CENTS.format(row="")}), SUM(units), COUNT(*) FROM tickets GROUP BY type;
+        COMMIT;
+    """)
+
+
+def drop(conn):
+    """Removes everything materialize() added; inserts go back to their plain cost."""
+    conn.executescript("BEGIN;" + DROP + "COMMIT;")
+
+
+def is_materialized(conn):
+    """True if the triggers are in place and the aggregate table has the current (cents) layout."""
+    row = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'tickets' "
+        "AND name IN ('tickets_sales_insert', 'tickets_sales_delete', 'tickets_sales_update')"
+    ).fetchone()
+    if row[0] != 3:
+        return False
+    columns = {column[1] for column in conn.execute(f"PRAGMA table_info({AGGREGATE_TABLE})")}
+    return "total_cents" in columns  # Tables from before cents wait for materialize() to rebuild them
+
+
+def total_sales_sql(conn, ticket_type):
+    """SQL for the total sales of one ticket type: a primary-key lookup when materialized, else a scan.
+
+    Both sum each ticket's units * price rounded to whole cents and divide
+    by 100 once, so they return the same single value, 0.0 when there are
+    no tickets of that type.
+    """
+    literal = "'" + ticket_type.replace("'", "''") + "'"
+    if is_materialized(conn):
+        return f"SELECT COALESCE((SELECT total_cents FROM {AGGREGATE_TABLE} WHERE type = {literal}), 0) / 100.0"
+    return f"SELECT COALESCE(SUM({CENTS.format(row='')}), 0) / 100.0 FROM tickets WHERE type = {literal}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("database")
+    parser.add_argument("--drop", action="store_true", help="remove the index, aggregate table and triggers")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    if args.drop:
+        drop(conn)
+        print(f"✅ Removed ticket aggregates from {args.database}")
+    else:
+        materialize(conn)
+        for row in conn.execute(f"SELECT type, total_cents / 100.0, ticket_count FROM {AGGREGATE_TABLE} ORDER BY type"):
+            print(row)
+        print(f"✅ Materialized ticket aggregates in {args.database}")
+    conn.close()
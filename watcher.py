@@ -0,0 +1,243 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from memo import fingerprint
+
+# inotify(7) event masks
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class Inotify:
+    """Minimal inotify binding over ctypes; raises OSError where inotify isn't available."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories = {}  # watch descriptor -> directory
+        self._watched = set()
+
+    def add(self, directory):
+        directory = os.path.abspath(directory)
+        if directory in self._watched:
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._directories[wd] = directory
+        self._watched.add(directory)
+
+    def read(self, timeout):
+        """Waits up to timeout seconds and returns [(path, mask)]. A queue overflow yields (None, mask)."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, mask))
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self._directories[wd]
+                self._watched.discard(directory)
+            events.append((os.path.join(directory, name) if name else directory, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Watch:
+    """A derived output kept hot: run() is called again whenever one of inputs changes."""
+
+    def __init__(self, name, run, inputs, outputs=()):
+        self.name = name
+        self.run = run
+        self.inputs = [os.path.abspath(path) for path in inputs]
+        self.outputs = [os.path.abspath(path) for path in outputs]
+
+    def affected_by(self, path):
+        if path in self.outputs:
+            return False
+        return any(path == root or path.startswith(root + os.sep) for root in self.inputs)
+
+    def directories(self):
+        """Directories to watch: every input directory (recursively) and the parent of every input."""
+        found = set()
+        for path in self.inputs:
+            parent = os.path.dirname(path)
+            while not os.path.isdir(parent) and os.path.dirname(parent) != parent:
+                parent = os.path.dirname(parent)  # Wait for missing inputs to be created
+            found.add(parent)
+            if os.path.isdir(path):
+                found.update(root for root, _, _ in os.walk(path))
+        return found
+
+
+class Watcher:
+    """Background thread that recomputes derived outputs when their inputs change.
+
+    Uses inotify where it is available and falls back to polling the inputs'
+    (mtime, size) fingerprints every poll_interval seconds. Changes are
+    debounced per output, so a burst of writes to its inputs triggers one
+    run; a steady stream of writes delays it by at most max_wait seconds.
+    Memoized handlers make a /run after a recompute a cache hit.
+    """
+
+    def __init__(self, watches, debounce=0.5, poll_interval=2.0, use_inotify=True, max_wait=5.0):
+        self.watches = watches
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {watch.name: {"runs": 0, "errors": 0, "last_run": None, "last_seconds": None, "last_status": None}
+                       for watch in watches}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._main, name="input-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _recompute(self, watches):
+        for watch in watches:
+            start = time.perf_counter()
+            try:
+                result = watch.run()
+                status = result.get("status")
+            except Exception as e:
+                status = f"error: {e}"
+            seconds = time.perf_counter() - start
+            with self._lock:
+                stats = self._stats[watch.name]
+                stats["runs"] += 1
+                stats["errors"] += status != "success"
+                stats["last_run"] = time.time()
+                stats["last_seconds"] = round(seconds, 4)
+                stats["last_status"] = status
+            print(f"DEBUG: watcher recomputed {watch.name} in {seconds:.3f}s ({status})")
+
+    def _main(self):
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = Inotify()
+                self._add_watches(inotify)  # Before the first run, so no change slips in between
+            except OSError as e:
+                print(f"DEBUG: inotify unavailable ({e}), polling inputs instead")
+        try:
+            if inotify is not None:
+                self.mode = "inotify"
+                self._recompute(self.watches)  # Start hot
+                self._watch_events(inotify)
+            else:
+                self.mode = "polling"
+                self._poll()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _add_watches(self, inotify):
+        for watch in self.watches:
+            for directory in watch.directories():
+                try:
+                    inotify.add(directory)
+                except OSError:
+                    pass  # Removed meanwhile
+
+    def _watch_events(self, inotify):
+        first_seen, deadlines = {}, {}  # watch name -> monotonic times
+        while not self._stop.is_set():
+            now = time.monotonic()
+            events = inotify.read(max(0.0, min(deadlines.values()) - now) if deadlines else 1.0)
+            now = time.monotonic()
+            changed = set()
+            for path, mask in events:
+                if path is None:
+                    changed.update(watch.name for watch in self.watches)  # Lost events, redo everything
+                    continue
+                if os.path.basename(path).startswith("."):
+                    continue  # Temp files of atomic_write and hidden state files
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_watches(inotify)
+                changed.update(watch.name for watch in self.watches if watch.affected_by(path))
+
+            # Only a watch's own inputs push its run back, and never past max_wait after the first change
+            for name in changed:
+                first_seen.setdefault(name, now)
+                deadlines[name] = min(now + self.debounce, first_seen[name] + self.max_wait)
+            due = {name for name, deadline in deadlines.items() if deadline <= now}
+            if due:
+                for name in due:
+                    del first_seen[name], deadlines[name]
+                self._recompute([watch for watch in self.watches if watch.name in due])  # In declaration order
+
+    def _signature(self, watch):
+        return fingerprint(watch.inputs, exclude=watch.outputs)
+
+    def _poll(self):
+        signatures = {watch.name: self._signature(watch) for watch in self.watches}
+        self._recompute(self.watches)  # Start hot
+        while not self._stop.wait(self.poll_interval):
+            changed = []
+            for watch in self.watches:
+                signature = self._signature(watch)
+                if signature != signatures[watch.name]:
+                    signatures[watch.name] = signature
+                    changed.append(watch)
+            if changed:
+                self._recompute(changed)
+
+    def stats(self):
+        with self._lock:
+            return {"mode": self.mode, "tasks": {name: dict(stats) for name, stats in self._stats.items()}}
+
+
+def derived_outputs():
+    """Watches for A3-A6, whose outputs are pure functions of files under data/."""
+    from task_executor import run_A3, run_A4, run_A5, run_A6
+
+    return [
+        Watch("A3", run_A3, ["data/dates.txt"], ["data/dates-wednesdays.txt"]),
+        Watch("A4", run_A4, ["data/contacts.json"], ["data/contacts-sorted.json"]),
+        Watch("A5", run_A5, ["data/logs"], ["data/logs-recent.txt"]),
+        Watch("A6", run_A6, ["data/docs"], ["data/docs/index.json", "data/docs/.index-state.json"]),
+    ]
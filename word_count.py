@@ -0,0 +1,200 @@
+import codecs
+import heapq
+import multiprocessing
+import os
+import re
+import string
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # Characters per read
+DEFAULT_SHARD_SIZE = 64 * 1024 * 1024  # Bytes of one file handled by one worker
+PARALLEL_THRESHOLD = 16 * 1024 * 1024  # Below this many bytes in total, count in-process
+PUNCTUATION = str.maketrans("", "", string.punctuation)
+WHITESPACE_BYTE = re.compile(rb"[ \t\n\r\x0b\x0c]")
+
+
+def iter_words(chunks):
+    """Yields lists of lowercased, punctuation-free words from an iterable of text chunks.
+
+    A word cut by a chunk boundary is carried over to the next chunk, so the
+    words come out exactly as from "".join(chunks).lower().translate(...).split().
+    """
+    carry = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        text = carry + chunk.lower().translate(PUNCTUATION)
+        words = text.split()
+        carry = ""
+        if words and not text[-1].isspace():
+            carry = words.pop()  # May continue in the next chunk
+        yield words
+    if carry:
+        yield [carry]
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitters summary that keeps at most `capacity` words.
+
+    When the summary is full, a new word replaces the word with the smallest
+    count and inherits that count as its error. Every count is an upper bound
+    that overshoots by at most `error`, and any word occurring more than
+    total / capacity times is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self._heap = []  # (count, word), may hold stale entries
+
+    def update(self, word, weight=1):
+        counts = self.counts
+        if word in counts:
+            counts[word] += weight
+        elif len(counts) < self.capacity:
+            counts[word] = weight
+            self.errors[word] = 0
+        else:
+            floor, victim = self._pop_min()
+            del counts[victim], self.errors[victim]
+            counts[word] = floor + weight
+            self.errors[word] = floor
+        heapq.heappush(self._heap, (counts[word], word))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, w) for w, count in counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, word = heapq.heappop(self._heap)
+            if self.counts.get(word) == count:
+                return count, word
+
+    def update_counts(self, counts):
+        """Adds a batch of exact counts, e.g. the Counter of one chunk."""
+        for word, weight in counts.items():
+            self.update(word, weight)
+
+    def most_common(self, n):
+        """Top n (word, count) pairs, largest first. Counts are upper bounds."""
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+
+def read_range(path, start, end, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields the text of the words that start in bytes [start, end) of a UTF-8 file.
+
+    A shard that begins mid-word skips to the end of that word, and a shard
+    that ends mid-word reads on until the word ends. Each word is therefore
+    counted by exactly one shard. Shards only split at ASCII whitespace bytes,
+    which are always character boundaries in UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        position = start
+        data = b""
+        if start > 0:
+            f.seek(start - 1)
+            if not WHITESPACE_BYTE.match(f.read(1)):
+                # The previous shard owns the word we landed in
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        return
+                    match = WHITESPACE_BYTE.search(data)
+                    if match:
+                        position = f.seek(f.tell() - len(data) + match.start())
+                        break
+                if position >= end:
+                    return
+
+        while position < end:
+            data = f.read(min(chunk_size, end - position))
+            if not data:
+                break
+            position += len(data)
+            yield decoder.decode(data)
+
+        # Finish the word that straddles the end of the shard
+        while data and not WHITESPACE_BYTE.match(data[-1:]):
+            data = f.read(4096)
+            match = WHITESPACE_BYTE.search(data)
+            if match:
+                yield decoder.decode(data[:match.start()])
+                break
+            yield decoder.decode(data)
+        yield decoder.decode(b"", final=True)
+
+
+def count_shard(path, start, end, capacity=None):
+    """Worker: word counts of one shard, exact or (with capacity) a Space-Saving summary."""
+    chunks = read_range(path, start, end)
+    if capacity is None:
+        counts = Counter()
+        for words in iter_words(chunks):
+            counts.update(words)
+        return counts
+
+    summary = SpaceSaving(capacity)
+    for words in iter_words(chunks):
+        summary.update_counts(Counter(words))
+    return summary.counts
+
+
+def plan_shards(paths, shard_size=DEFAULT_SHARD_SIZE):
+    """Splits files into (path, start, end) byte ranges of at most shard_size."""
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), shard_size):
+            shards.append((path, start, min(start + shard_size, size)))
+    return shards
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process pool shared by all word counts, started on first use.
+
+    Workers come from a forkserver rather than a fork of this process, which
+    by then runs other threads and could hand a child a lock held forever.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                        mp_context=multiprocessing.get_context("forkserver"))
+        return _pool
+
+
+def top_words(paths, num_words, approximate=False, shard_size=DEFAULT_SHARD_SIZE, pool=None):
+    """Top num_words (word, count) pairs across files, map-reduced over a process pool.
+
+    Files are cut into byte-range shards, counted by the pool's workers and
+    the per-shard counts merged. Inputs under PARALLEL_THRESHOLD bytes are
+    counted in-process, where starting workers would cost more than it saves.
+    In approximate mode each worker keeps a Space-Saving summary, and the
+    summaries are merged by adding counts, which keeps them upper bounds.
+    """
+    capacity = max(10_000, 100 * num_words) if approximate else None
+
+    if sum(os.path.getsize(path) for path in paths) < PARALLEL_THRESHOLD:
+        partials = [count_shard(path, 0, os.path.getsize(path), capacity) for path in paths]
+    else:
+        shards = plan_shards(paths, shard_size)
+        partials = (pool or get_pool()).map(count_shard, *zip(*shards), [capacity] * len(shards))
+
+    if not approximate:
+        total = Counter()
+        for counts in partials:
+            total.update(counts)
+        return total.most_common(num_words)
+
+    summary = SpaceSaving(capacity)
+    for counts in partials:
+        summary.update_counts(counts)
+    return summary.most_common(num_words)